@@ -0,0 +1,257 @@
+"""Headless benchmarks of every game state
+
+Runs each state under the SDL dummy video driver, feeding a scripted input
+stream through the real event handlers and draw functions, and writes the
+results as JSON:
+
+    python benchmarks/run_benchmarks.py --frames 600 --output bench_results.json
+    python benchmarks/run_benchmarks.py --baseline bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# Run from the repository root so assets and modules resolve as in the game
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+from games.two_choice import init_two_choice
+from games.shape_grid import init_shape_grid
+from games.memory_grid import init_memory_grid
+from utils import dirty_rects
+from utils.profiler import percentiles
+from utils.timer import Timer, set_frame_ticks
+from utils.clock import GameClock
+
+# Game time advanced per frame, the input scripts are written for 60 frames per second
+FRAME_MS = 1000 / 60
+
+def key(k):
+    """Create a key press event"""
+    return pygame.event.Event(pygame.KEYDOWN, key=k, mod=0, unicode="", scancode=0)
+
+def click(pos):
+    """Create a left mouse button press event"""
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+
+def motion(pos):
+    """Create a mouse motion event"""
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))
+
+def menu_input(frame, size):
+    """Move the mouse around the menu and press keys that keep it open"""
+    width, height = size
+    if frame % 10 == 0:
+        return [motion((frame * 7 % width, frame * 3 % height))]
+    if frame % 30 == 5:
+        return [key(pygame.K_DOWN), key(pygame.K_UP)]
+    return []
+
+def rules_input(frame, size):
+    """Move the mouse around the rules modal without pressing its buttons"""
+    width, height = size
+    if frame % 10 == 0:
+        return [motion((frame * 7 % width, frame * 3 % height))]
+    if frame % 30 == 5:
+        return [click((5, height - 5))]
+    return []
+
+def two_choice_input(frame, size):
+    """Answer every 40 frames, alternating keyboard and mouse"""
+    width, height = size
+    if frame % 80 == 10:
+        return [key(pygame.K_LEFT if frame % 160 == 10 else pygame.K_RIGHT)]
+    if frame % 80 == 50:
+        return [click((width // 2 + 150, 250))]
+    return []
+
+def shape_grid_input(frame, size):
+    """Pick a cell every 60 frames, after the feedback of the last one ended"""
+    if frame % 60 == 10:
+        return [key(pygame.K_1 + (frame // 60) % 9)]
+    return []
+
+def memory_grid_input(frame, size):
+    """Toggle a few cells once the pattern is hidden and submit them"""
+    phase = frame % 180
+    if phase in (130, 140, 150):
+        return [key(pygame.K_1 + (frame // 180 + phase) % 9)]
+    if phase == 170:
+        return [key(pygame.K_RETURN)]
+    return []
+
+def game_over_input(frame, size):
+    """Move the mouse over the game over screen"""
+    width, height = size
+    if frame % 10 == 0:
+        return [motion((frame * 7 % width, frame * 3 % height))]
+    return []
+
+def start_game(state, init):
+    """Return a setup function that starts a game in the given state"""
+    def setup():
+        set_frame_ticks(0)
+        main.clock.reset()
+        main.selected_game = state
+        main.timer = Timer(3600)  # Never expires during a benchmark
+        main.game_data = {"score": 0}
+        init()
+        main.current_state = state
+    return setup
+
+def start_screen(state):
+    """Return a setup function that shows a static screen"""
+    def setup():
+        set_frame_ticks(0)
+        main.clock.reset()
+        main.selected_game = main.STATE_SHAPE_GRID
+        main.timer = Timer(0) if state == main.STATE_GAME_OVER else None
+        main.game_data = {"score": 120}
+        main.current_state = state
+    return setup
+
+SCENARIOS = [
+    (main.STATE_MENU, start_screen(main.STATE_MENU), menu_input),
+    (main.STATE_RULES, start_screen(main.STATE_RULES), rules_input),
+    (main.STATE_TWO_CHOICE, start_game(main.STATE_TWO_CHOICE, init_two_choice), two_choice_input),
+    (main.STATE_SHAPE_GRID, start_game(main.STATE_SHAPE_GRID, init_shape_grid), shape_grid_input),
+    (main.STATE_MEMORY_GRID, start_game(main.STATE_MEMORY_GRID, init_memory_grid), memory_grid_input),
+    (main.STATE_GAME_OVER, start_screen(main.STATE_GAME_OVER), game_over_input),
+]
+
+def run_frame(frame, script, size):
+    """Run one frame of the main loop with scripted input, without the frame cap"""
+    ticks = round(frame * FRAME_MS)
+    set_frame_ticks(ticks)
+    for event in script(frame, size):
+        main.handle_event(event)
+    main.update(ticks)
+    main.draw_frame()
+    dirty_rects.present()
+
+def run_scenario(setup, script, frames, size):
+    """Benchmark one state, returning its timings and allocations"""
+    setup()
+    dirty_rects.mark_full()
+
+    # Warm up caches like a player who has seen the screen for a moment
+    for frame in range(30):
+        run_frame(frame, script, size)
+
+    setup()
+    frame_times = []
+    start = time.perf_counter()
+    for frame in range(frames):
+        frame_start = time.perf_counter()
+        run_frame(frame, script, size)
+        frame_times.append((time.perf_counter() - frame_start) * 1000)
+    elapsed = time.perf_counter() - start
+
+    # Count allocations in a separate pass, tracing slows every frame down
+    setup()
+    alloc_frames = min(frames, 120)
+    allocated = 0
+    blocks = 0
+    tracemalloc.start()
+    for frame in range(alloc_frames):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        blocks_before = sys.getallocatedblocks()
+        run_frame(frame, script, size)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+        blocks += max(0, sys.getallocatedblocks() - blocks_before)
+    tracemalloc.stop()
+
+    stats = percentiles(frame_times)
+    stats["mean"] = sum(frame_times) / len(frame_times)
+    return {
+        "frames": frames,
+        "fps": frames / elapsed if elapsed else 0.0,
+        "frame_ms": stats,
+        "alloc_bytes_per_frame": allocated / alloc_frames,
+        "alloc_blocks_per_frame": blocks / alloc_frames
+    }
+
+def set_up_display(size):
+    """Create the window and fonts the way main.main() does"""
+    pygame.display.init()
+    pygame.font.init()
+    main.SCREEN_WIDTH, main.SCREEN_HEIGHT = size
+    main.screen = pygame.display.set_mode(size, pygame.RESIZABLE)
+    main.clock = GameClock(main.FPS)
+    main.font_small = pygame.font.Font(None, 24)
+    main.font_medium = pygame.font.Font(None, 36)
+    main.font_large = pygame.font.Font(None, 48)
+    main.highscores = {"two_choice": 150, "shape_grid": 90, "memory_grid": 60}
+    main.sound_enabled = False
+    dirty_rects.enabled = main.DIRTY_RECTS
+
+def compare(results, baseline):
+    """Print the change of mean frame time against a baseline run"""
+    print(f"{'state':<12} {'mean ms':>9} {'baseline':>9} {'change':>8}")
+    for state, result in results["states"].items():
+        old = baseline.get("states", {}).get(state)
+        if not old:
+            continue
+        new_mean = result["frame_ms"]["mean"]
+        old_mean = old["frame_ms"]["mean"]
+        change = (new_mean - old_mean) / old_mean * 100 if old_mean else 0.0
+        print(f"{state:<12} {new_mean:>9.3f} {old_mean:>9.3f} {change:>+7.1f}%")
+
+def main_benchmark():
+    """Run the benchmarks selected on the command line"""
+    parser = argparse.ArgumentParser(description="Headless MindGym benchmarks")
+    parser.add_argument("--frames", type=int, default=600, help="frames measured per state")
+    parser.add_argument("--size", default="800x600", help="window size, e.g. 1280x720")
+    parser.add_argument("--states", nargs="*", help="only run these states")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    args = parser.parse_args()
+
+    size = tuple(int(part) for part in args.size.lower().split("x"))
+    set_up_display(size)
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "sdl": ".".join(str(part) for part in pygame.get_sdl_version()),
+            "platform": platform.platform(),
+            "window": list(size),
+            "dirty_rects": main.DIRTY_RECTS
+        },
+        "states": {}
+    }
+
+    for state, setup, script in SCENARIOS:
+        if args.states and state not in args.states:
+            continue
+        result = run_scenario(setup, script, args.frames, size)
+        results["states"][state] = result
+        frame_ms = result["frame_ms"]
+        print(f"{state:<12} {result['fps']:>8.0f} fps  p50 {frame_ms['p50']:.3f}  p95 {frame_ms['p95']:.3f}  "
+              f"p99 {frame_ms['p99']:.3f}  max {frame_ms['max']:.3f} ms  {result['alloc_bytes_per_frame']:.0f} B/frame")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    main_benchmark()
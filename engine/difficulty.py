@@ -0,0 +1,38 @@
+import math
+
+# Level n is rated n * LEVEL_STEP, a player rated TARGET_OFFSET above a level answers 75% of it right
+LEVEL_STEP = 100
+TARGET_OFFSET = 400 * math.log10(3)
+
+# Rating points an answer moves at most, a right answer at the target rate gains K / 4 and a wrong one loses 3K / 4
+K = 40
+
+class DifficultyModel:
+    """A player's Elo-style rating at one game and the level it earns, updated in constant time per answer"""
+    __slots__ = ("rating", "levels", "answers")
+
+    def __init__(self, levels, level=0):
+        """Initialize a model for a game with levels difficulty levels, starting at level"""
+        self.levels = levels
+        self.rating = level * LEVEL_STEP + TARGET_OFFSET
+        self.answers = 0
+
+    @property
+    def level(self):
+        """Get the level the player should play to answer about 75% right"""
+        level = round((self.rating - TARGET_OFFSET) / LEVEL_STEP)
+        return min(self.levels - 1, max(0, level))
+
+    def expected(self, level):
+        """Get the expected outcome of an answer at a level"""
+        return 1 / (1 + 10 ** ((level * LEVEL_STEP - self.rating) / 400))
+
+    def update(self, outcome):
+        """Move the rating by the outcome of an answer at the current level, 1 for right and 0 for wrong"""
+        self.rating += K * (outcome - self.expected(self.level))
+        self.answers += 1
+
+        # Stay within half a level of the scale, so a long run at either end is undone as fast as any level change
+        low = TARGET_OFFSET - LEVEL_STEP / 2
+        high = TARGET_OFFSET + (self.levels - 0.5) * LEVEL_STEP
+        self.rating = min(high, max(low, self.rating))
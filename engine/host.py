@@ -0,0 +1,218 @@
+"""Run many headless game sessions across a process pool
+
+Each session has its own seeded game, its own clock and its own input
+script, so any number of them can run side by side:
+
+    python -m engine.host --game shape_grid --sessions 10000 --script random
+    python -m engine.host --game memory_grid --script perfect --workers 8 --output host_results.json
+    python -m engine.host --game two_choice --script answers.json
+
+A script file is a JSON list of [delay_ms, action] pairs, played in order
+and repeated until the session time is up. Delays count from when the game
+accepts input again, after the feedback or the memory pattern. Actions are
+the server's: 0 or 1 for the left or right item in two_choice, [row, col]
+for a cell in shape_grid and memory_grid, and "submit" in memory_grid:
+
+    [[600, [1, 2]], [300, [0, 0]], [500, "submit"]]
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from engine.two_choice import TwoChoiceSession
+from engine.shape_grid import ShapeGridSession, GRID_ROWS as SHAPE_ROWS, GRID_COLS as SHAPE_COLS
+from engine.memory_grid import MemoryGridSession, SUBMIT, GRID_ROWS as MEMORY_ROWS, GRID_COLS as MEMORY_COLS
+
+# Sessions last as long as in the game
+SESSION_MS = 30 * 1000
+
+# Time a scripted player takes per action, in milliseconds
+RESPONSE_MEAN_MS = 450
+RESPONSE_SD_MS = 120
+RESPONSE_MIN_MS = 150
+
+# Rounds generated per refill, a session of 30 seconds plays fewer than the game's default batch
+ROUND_BATCH_SIZE = 32
+
+SESSIONS = {
+    "two_choice": TwoChoiceSession,
+    "shape_grid": ShapeGridSession,
+    "memory_grid": MemoryGridSession
+}
+
+def two_choice_actions(session, rng, perfect):
+    """Pick the larger item, or a random one"""
+    if perfect:
+        return [session.larger_item()]
+    return [rng.randrange(2)]
+
+def shape_grid_actions(session, rng, perfect):
+    """Pick a cell matching the target, or a random cell"""
+    if perfect:
+        for row in range(SHAPE_ROWS):
+            for col in range(SHAPE_COLS):
+                if session.is_match(row, col):
+                    return [(row, col)]
+    return [(rng.randrange(SHAPE_ROWS), rng.randrange(SHAPE_COLS))]
+
+def memory_grid_actions(session, rng, perfect):
+    """Toggle the highlighted cells, or as many random cells, then submit"""
+    count = session.highlighted.bit_count()
+    if perfect:
+        indexes = [index for index in range(MEMORY_ROWS * MEMORY_COLS) if session.highlighted >> index & 1]
+    else:
+        indexes = rng.sample(range(MEMORY_ROWS * MEMORY_COLS), count)
+    return [divmod(index, MEMORY_COLS) for index in indexes] + [SUBMIT]
+
+STRATEGIES = {
+    "two_choice": two_choice_actions,
+    "shape_grid": shape_grid_actions,
+    "memory_grid": memory_grid_actions
+}
+
+def scripted_input(game, session, rng, perfect):
+    """Yield (delay_ms, action) of a player answering every round"""
+    strategy = STRATEGIES[game]
+    while True:
+        for action in strategy(session, rng, perfect):
+            delay = max(RESPONSE_MIN_MS, round(rng.gauss(RESPONSE_MEAN_MS, RESPONSE_SD_MS)))
+            yield delay, action
+
+def parse_action(game, action):
+    """Turn an action from a script or a message into a session action, None if it isn't valid"""
+    if game == "two_choice":
+        return action if action in (0, 1) else None
+    if game == "memory_grid" and action == SUBMIT:
+        return SUBMIT
+    rows, cols = (SHAPE_ROWS, SHAPE_COLS) if game == "shape_grid" else (MEMORY_ROWS, MEMORY_COLS)
+    if (isinstance(action, (list, tuple)) and len(action) == 2 and all(isinstance(value, int) for value in action)
+            and 0 <= action[0] < rows and 0 <= action[1] < cols):
+        return tuple(action)
+    return None
+
+def recorded_input(game, steps):
+    """Yield the recorded (delay_ms, action) pairs over and over"""
+    steps = [(delay, parse_action(game, action)) for delay, action in steps]
+    while True:
+        yield from steps
+
+def run_session(spec):
+    """Play one session until its time is up and return its result"""
+    game, seed, script = spec
+    start = time.perf_counter()
+
+    # The session and the scripted player get their own generators, both from the seed
+    session = SESSIONS[game](seed=seed, batch_size=ROUND_BATCH_SIZE)
+    player_rng = random.Random(seed ^ 0x5EED)
+    if isinstance(script, str):
+        actions = scripted_input(game, session, player_rng, script == "perfect")
+    else:
+        actions = recorded_input(game, script)
+
+    # The session clock only moves with the input and the phases the game locks input in, it never waits for real time
+    elapsed = session.FIRST_LOCKOUT_MS
+    steps = 0
+    answers = 0
+    correct = 0
+    for delay, action in actions:
+        elapsed += delay
+        if elapsed >= SESSION_MS:
+            break
+        result = session.step(action)
+        steps += 1
+        if result is not None:
+            answers += 1
+            correct += result["correct"]
+            elapsed += session.LOCKOUT_MS
+
+    return {
+        "game": game,
+        "seed": seed,
+        "score": session.score,
+        "rounds": session.round,
+        "answers": answers,
+        "correct": correct,
+        "steps": steps,
+        "cpu_ms": (time.perf_counter() - start) * 1000
+    }
+
+def session_seeds(seed, count):
+    """Get a distinct seed for each of count sessions"""
+    rng = random.Random(seed)
+    return [rng.getrandbits(64) for _ in range(count)]
+
+def check_script(game, script):
+    """Raise ValueError if a recorded script has an invalid step or would never use up a session's time"""
+    if not isinstance(script, list) or not script:
+        raise ValueError("the script must be a list of at least one step")
+    for step in script:
+        if not isinstance(step, (list, tuple)) or len(step) != 2 or not isinstance(step[0], (int, float)) or step[0] < 0:
+            raise ValueError(f"script steps must be [delay_ms, action] with a delay of 0 or more, got {step!r}")
+        if parse_action(game, step[1]) is None:
+            raise ValueError(f"{step[1]!r} is not a {game} action")
+    if sum(delay for delay, _ in script) <= 0:
+        raise ValueError("the script's delays add up to 0 ms, a session would never end")
+
+def run_sessions(game, count, script="random", workers=None, seed=None):
+    """Run count sessions on a pool of worker processes, return their results and the throughput"""
+    if not isinstance(script, str):
+        check_script(game, script)
+    workers = workers or os.cpu_count() or 1
+    specs = [(game, session_seed, script) for session_seed in session_seeds(seed, count)]
+
+    # Hand out sessions in chunks, a few per worker keeps them busy without much pickling
+    chunksize = max(1, count // (workers * 4))
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(run_session, specs, chunksize=chunksize))
+    wall = time.perf_counter() - start
+
+    steps = sum(result["steps"] for result in results)
+    metrics = {
+        "game": game,
+        "script": script if isinstance(script, str) else "recorded",
+        "sessions": count,
+        "workers": workers,
+        "wall_s": wall,
+        "sessions_per_s": count / wall if wall else 0.0,
+        "steps_per_s": steps / wall if wall else 0.0,
+        "session_cpu_ms": sum(result["cpu_ms"] for result in results) / count if count else 0.0,
+        "mean_score": sum(result["score"] for result in results) / count if count else 0.0
+    }
+    return results, metrics
+
+def main_host():
+    """Run the sessions selected on the command line"""
+    parser = argparse.ArgumentParser(description="Run headless MindGym sessions on a process pool")
+    parser.add_argument("--game", choices=sorted(SESSIONS), default="two_choice")
+    parser.add_argument("--sessions", type=int, default=1000, help="number of sessions to run")
+    parser.add_argument("--script", default="random",
+                        help="random, perfect or a JSON file of [delay_ms, action] pairs")
+    parser.add_argument("--workers", type=int, help="worker processes, all cores by default")
+    parser.add_argument("--seed", type=int, help="seed of the session seeds, random by default")
+    parser.add_argument("--output", help="where to write the results as JSON")
+    args = parser.parse_args()
+
+    script = args.script
+    if script not in ("random", "perfect"):
+        try:
+            with open(script) as f:
+                script = json.load(f)
+            check_script(args.game, script)
+        except (OSError, ValueError) as error:
+            parser.error(f"{args.script}: {error}")
+
+    results, metrics = run_sessions(args.game, args.sessions, script, args.workers, args.seed)
+    print(f"{metrics['sessions']} {metrics['game']} sessions on {metrics['workers']} workers in {metrics['wall_s']:.2f} s")
+    print(f"{metrics['sessions_per_s']:.0f} sessions/s  {metrics['steps_per_s']:.0f} steps/s  "
+          f"{metrics['session_cpu_ms']:.2f} ms per session  mean score {metrics['mean_score']:.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"metrics": metrics, "sessions": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main_host()
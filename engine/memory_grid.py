@@ -0,0 +1,86 @@
+from engine.rounds import AdaptiveSession, DEFAULT_BATCH_SIZE
+
+GRID_ROWS = 3
+GRID_COLS = 4
+
+# Number of highlighted cells at each difficulty level, and the levels to start from
+LEVELS = [2, 3, 4, 5, 6, 7, 8, 9]
+DIFFICULTY_CELLS = {"easy": 3, "medium": 5, "hard": 7}
+
+# Points per correct and per wrong square
+CORRECT_POINTS = 5
+WRONG_POINTS = -2
+
+# How long the pattern is shown before the cells can be selected
+HIGHLIGHT_MS = 2000
+
+# Action that submits the current selection
+SUBMIT = "submit"
+
+# Sets of cells are bitmasks, bit row * GRID_COLS + col stands for the cell (row, col)
+def cell_bit(row, col):
+    """Get the bit of a cell"""
+    return 1 << (row * GRID_COLS + col)
+
+def generate_rounds(rng, count, num_to_highlight):
+    """Generate count rounds as bitmasks of highlighted cells"""
+    num_cells = GRID_ROWS * GRID_COLS
+    
+    rounds = []
+    for _ in range(count):
+        # Sampling without replacement needs no rejection loop
+        mask = 0
+        for index in rng.sample(range(num_cells), num_to_highlight):
+            mask |= 1 << index
+        rounds.append(mask)
+    return rounds
+
+def is_valid_round(game_round, num_to_highlight):
+    """Check that a round highlights the right number of distinct cells inside the grid"""
+    return 0 <= game_round < 1 << (GRID_ROWS * GRID_COLS) and game_round.bit_count() == num_to_highlight
+
+class MemoryGridSession(AdaptiveSession):
+    """Memory Recall game state and scoring, without pygame"""
+    LEVELS = LEVELS
+    generate = staticmethod(generate_rounds)
+    FIRST_LOCKOUT_MS = HIGHLIGHT_MS
+    LOCKOUT_MS = HIGHLIGHT_MS
+    
+    def __init__(self, difficulty="hard", seed=None, batch_size=DEFAULT_BATCH_SIZE, model=None):
+        """Initialize a session with its own random generator and round pool, adapting to a difficulty model"""
+        self.difficulty = difficulty
+        level = LEVELS.index(DIFFICULTY_CELLS.get(difficulty, DIFFICULTY_CELLS["hard"]))
+        self.init_rounds(seed, batch_size, model, level)
+        self.score = 0
+        self.round = 0
+        self.highlighted = 0  # bitmask of the cells to remember
+        self.selected = 0  # bitmask of the cells the player selected
+        self.new_round()
+    
+    def new_round(self):
+        """Highlight new random cells from the round pool and clear the selection"""
+        self.highlighted = self.pool.next()
+        self.selected = 0
+        self.round += 1
+    
+    def toggle(self, row, col):
+        """Toggle the selection state of a cell"""
+        self.selected ^= cell_bit(row, col)
+    
+    def step(self, action):
+        """Toggle the (row, col) cell, or score the selection and start the next round on SUBMIT"""
+        if action != SUBMIT:
+            self.toggle(*action)
+            return None
+        
+        # Calculate correct and incorrect selections
+        hits = (self.selected & self.highlighted).bit_count()
+        misses = (self.selected & ~self.highlighted).bit_count()
+        
+        points = hits * CORRECT_POINTS + misses * WRONG_POINTS
+        self.score += points
+        
+        # The share of the pattern recalled, less the wrong cells, is the outcome of the answer
+        self.adapt(max(0, hits - misses) / self.highlighted.bit_count())
+        self.new_round()
+        return {"correct": hits > 0, "points": points, "hits": hits, "misses": misses}
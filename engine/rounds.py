@@ -0,0 +1,88 @@
+import random
+from collections import deque
+
+# Rounds generated per refill of a pool
+DEFAULT_BATCH_SIZE = 256
+
+# Rounds generated at once for a level that has no pool yet, and per top-up while the game runs
+LEVEL_BATCH_SIZE = 4
+TOP_UP_ROUNDS = 8
+
+class RoundPool:
+    """A refillable queue of pre-generated rounds that sessions consume from"""
+    
+    def __init__(self, generate, rng, batch_size=DEFAULT_BATCH_SIZE, first_batch=None):
+        """Initialize the pool with a generate(rng, count) function and fill it, or only first_batch rounds of it"""
+        self.generate = generate
+        self.rng = rng
+        self.batch_size = batch_size
+        self.rounds = deque()
+        self.refill(first_batch)
+    
+    def refill(self, limit=None):
+        """Top the pool up to a full batch, or by at most limit rounds, e.g. while nothing is being played"""
+        missing = self.batch_size - len(self.rounds)
+        if limit is not None:
+            missing = min(missing, limit)
+        if missing > 0:
+            self.rounds.extend(self.generate(self.rng, missing))
+    
+    def next(self):
+        """Take the next round, generating a new batch if the pool ran dry"""
+        if not self.rounds:
+            self.refill()
+        return self.rounds.popleft()
+    
+    def clear(self):
+        """Drop the pre-generated rounds, e.g. after the game parameters changed"""
+        self.rounds.clear()
+
+class AdaptiveSession:
+    """Base of the game sessions: a round pool per difficulty level, following a difficulty model"""
+    
+    # Set by each game: the parameter of every level and generate_rounds(rng, count, parameter)
+    LEVELS = [None]
+    generate = None
+    
+    # Milliseconds before the first round, and each round after an answer, can be answered
+    FIRST_LOCKOUT_MS = 0
+    LOCKOUT_MS = 0
+    
+    def init_rounds(self, seed, batch_size, model, level=0):
+        """Set up the random generator and the pool of the starting level"""
+        self.rng = random.Random(seed)
+        self.model = model
+        self.level = model.level if model else level
+        self.batch_size = batch_size
+        self.pools = {}
+        self.pool = self.level_pool(self.level, batch_size)
+    
+    def level_pool(self, level, first_batch):
+        """Get the pool of a level, creating it with first_batch rounds"""
+        pool = self.pools.get(level)
+        if pool is None:
+            # Each level draws from its own generator, so its rounds don't depend on when pools are topped up
+            parameter = self.LEVELS[level]
+            pool = self.pools[level] = RoundPool(
+                lambda rng, count: self.generate(rng, count, parameter),
+                random.Random(self.rng.getrandbits(64)),
+                self.batch_size,
+                first_batch
+            )
+        return pool
+    
+    def set_level(self, level):
+        """Play the next rounds at a level, from its pool or a short batch generated for it"""
+        if level != self.level:
+            self.level = level
+            self.pool = self.level_pool(level, LEVEL_BATCH_SIZE)
+    
+    def adapt(self, outcome):
+        """Update the difficulty model with the outcome of an answer, 1 for right, and follow its level"""
+        if self.model:
+            self.model.update(outcome)
+            self.set_level(self.model.level)
+    
+    def top_up(self, limit=TOP_UP_ROUNDS):
+        """Generate a few rounds for the current level, called while no answer is being scored"""
+        self.pool.refill(limit)
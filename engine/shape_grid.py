@@ -0,0 +1,129 @@
+from engine.rounds import AdaptiveSession, DEFAULT_BATCH_SIZE
+
+# Shape types
+SHAPES = ["circle", "square", "triangle", "star", "diamond"]
+COLORS = ["red", "blue", "green", "yellow", "purple"]
+ROTATIONS = [0, 90, 180, 270]
+
+GRID_ROWS = 3
+GRID_COLS = 3
+
+# Points for a correct and a wrong answer
+CORRECT_POINTS = 15
+WRONG_POINTS = -5
+
+# How long an answer is shown before the next grid appears
+FEEDBACK_MS = 800
+
+# Chance that a distractor resembles the target at each difficulty level
+LEVELS = [0.0, 0.15, 0.3, 0.45, 0.6, 0.75, 0.9]
+
+def generate_rounds(rng, count, similarity=LEVELS[0]):
+    """Generate count rounds as (cells, target index, include color)"""
+    num_cells = GRID_ROWS * GRID_COLS
+    shapes = rng.choices(SHAPES, k=count * num_cells)
+    colors = rng.choices(COLORS, k=count * num_cells)
+    rotations = rng.choices(ROTATIONS, k=count * num_cells)
+    targets = rng.choices(range(num_cells), k=count)
+    
+    rounds = []
+    for i in range(count):
+        start = i * num_cells
+        end = start + num_cells
+        cells = tuple(zip(shapes[start:end], colors[start:end], rotations[start:end]))
+        include_color = rng.random() < 0.5
+        if similarity:
+            cells = resemble(rng, cells, targets[i], include_color, similarity)
+        rounds.append((cells, targets[i], include_color))
+    return rounds
+
+def resemble(rng, cells, target, include_color, similarity):
+    """Give distractors the target's color, or its shape when the color counts, without making them match"""
+    target_shape, target_color, _ = cells[target]
+    other_shapes = [shape for shape in SHAPES if shape != target_shape]
+    other_colors = [color for color in COLORS if color != target_color]
+    
+    cells = list(cells)
+    for index, (shape, color, rotation) in enumerate(cells):
+        if index != target and rng.random() < similarity:
+            if include_color:
+                cells[index] = (target_shape, rng.choice(other_colors), rotation)
+            else:
+                cells[index] = (rng.choice(other_shapes), target_color, rotation)
+    return tuple(cells)
+
+def is_valid_round(game_round):
+    """Check that a round has a full grid of known shapes and a target inside it"""
+    cells, target, include_color = game_round
+    return (
+        len(cells) == GRID_ROWS * GRID_COLS
+        and 0 <= target < len(cells)
+        and all(
+            shape in SHAPES and color in COLORS and rotation in ROTATIONS
+            for shape, color, rotation in cells
+        )
+    )
+
+class ShapeGridSession(AdaptiveSession):
+    """Find the Shape game state and scoring, without pygame"""
+    LEVELS = LEVELS
+    generate = staticmethod(generate_rounds)
+    LOCKOUT_MS = FEEDBACK_MS
+    
+    def __init__(self, seed=None, batch_size=DEFAULT_BATCH_SIZE, model=None):
+        """Initialize a session with its own random generator and round pool, adapting to a difficulty model"""
+        self.init_rounds(seed, batch_size, model)
+        self.score = 0
+        self.round = 0
+        self.cells = ()  # (shape, color, rotation) of each cell, row by row
+        self.target_shape = ""
+        self.target_color = ""
+        self.include_color = False
+        self.new_round()
+    
+    def new_round(self):
+        """Take a new grid and its target from the round pool"""
+        # The pooled round is used as it is, nothing is allocated per round
+        cells, target, include_color = self.pool.next()
+        self.cells = cells
+        
+        # The target is one of the cells of the grid
+        self.target_shape, self.target_color, _ = cells[target]
+        self.include_color = include_color
+        self.round += 1
+    
+    def target_text(self):
+        """Get the description of the target shown to the player"""
+        text = f"Find: {self.target_shape.capitalize()}"
+        if self.include_color:
+            text += f" ({self.target_color.capitalize()})"
+        return text
+    
+    def cell(self, row, col):
+        """Get the (shape, color, rotation) of a cell"""
+        return self.cells[row * GRID_COLS + col]
+    
+    def is_match(self, row, col):
+        """Check if a cell matches the target description"""
+        shape, color, _ = self.cell(row, col)
+        if self.include_color:
+            # Both shape and color must match
+            return shape == self.target_shape and color == self.target_color
+        # Only the shape must match
+        return shape == self.target_shape
+    
+    def step(self, action):
+        """Select the (row, col) cell, score it and start the next round"""
+        row, col = action
+        correct = self.is_match(row, col)
+        
+        if correct:
+            points = CORRECT_POINTS
+        else:
+            # Prevent negative score
+            points = max(WRONG_POINTS, -self.score)
+        self.score += points
+        
+        self.adapt(1 if correct else 0)
+        self.new_round()
+        return {"correct": correct, "points": points}
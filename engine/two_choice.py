@@ -0,0 +1,64 @@
+from engine.rounds import AdaptiveSession, DEFAULT_BATCH_SIZE
+
+# Points for a correct and a wrong answer
+CORRECT_POINTS = 10
+WRONG_POINTS = -5
+
+# How long an answer is shown, the next round can't be answered before
+FEEDBACK_MS = 500
+
+# Largest difference between the two numbers at each difficulty level, closer numbers are harder
+LEVELS = [99, 60, 40, 25, 15, 10, 6, 3, 1]
+
+def generate_rounds(rng, count, max_gap=LEVELS[0]):
+    """Generate count rounds as (left, right) number pairs at most max_gap apart"""
+    if max_gap >= 99:
+        values = rng.choices(range(1, 101), k=count * 2)
+        return list(zip(values[0::2], values[1::2]))
+    
+    rounds = []
+    for _ in range(count):
+        # A different number within max_gap on either side, as far as the range allows
+        left = rng.randint(1, 100)
+        right = rng.randint(max(1, left - max_gap), min(100, left + max_gap) - 1)
+        if right >= left:
+            right += 1
+        rounds.append((left, right))
+    return rounds
+
+def is_valid_round(game_round):
+    """Check that both numbers of a round are in range"""
+    return len(game_round) == 2 and all(1 <= value <= 100 for value in game_round)
+
+class TwoChoiceSession(AdaptiveSession):
+    """Pick the Bigger game state and scoring, without pygame"""
+    LEVELS = LEVELS
+    generate = staticmethod(generate_rounds)
+    LOCKOUT_MS = FEEDBACK_MS
+    
+    def __init__(self, seed=None, batch_size=DEFAULT_BATCH_SIZE, model=None):
+        """Initialize a session with its own random generator and round pool, adapting to a difficulty model"""
+        self.init_rounds(seed, batch_size, model)
+        self.score = 0
+        self.round = 0
+        self.values = (0, 0)
+        self.new_round()
+    
+    def new_round(self):
+        """Take two new numbers for the player to choose from"""
+        self.values = self.pool.next()
+        self.round += 1
+    
+    def larger_item(self):
+        """Get the index of the larger item (the right one on a tie)"""
+        return 0 if self.values[0] > self.values[1] else 1
+    
+    def step(self, action):
+        """Select item 0 (left) or 1 (right), score it and start the next round"""
+        correct = action == self.larger_item()
+        points = CORRECT_POINTS if correct else WRONG_POINTS
+        self.score += points
+        
+        self.adapt(1 if correct else 0)
+        self.new_round()
+        return {"correct": correct, "points": points}
@@ -1,143 +1,102 @@
 import pygame
-import random
+from utils.dirty_rects import mark_dirty
+from utils.text_cache import render_text
+from utils.trials import report_trial
+from utils import reaction
+from utils.layout import memory_grid_layout, window_size
+from engine.memory_grid import MemoryGridSession, SUBMIT, LEVELS, DIFFICULTY_CELLS, HIGHLIGHT_MS, cell_bit
+from engine.difficulty import DifficultyModel
 
-memory_grid = []
-highlighted_cells = []
-selected_cells = []
+session = None
 showing_highlight = True
 highlight_timer = 0
 game_round = 0
-difficulty = "hard"  # Can be "easy", "medium", or "hard"
+difficulty = "hard"  # Where the player starts: "easy", "medium", or "hard", the level then adapts
+model = None  # The player's difficulty model, kept across sessions
+drawn_state = None
 
-def init_memory_grid():
-    """Initialize the memory grid game"""
-    global memory_grid, highlighted_cells, selected_cells, showing_highlight, highlight_timer, game_round
+def init_memory_grid(seed=None):
+    """Initialize the memory grid game, a seed makes its rounds reproducible"""
+    global session, showing_highlight, highlight_timer, game_round, model
     
-    # Generate a new grid
-    memory_grid = generate_grid()
+    # Start a new session, it highlights as many cells as the player's level calls for
+    if model is None:
+        model = DifficultyModel(len(LEVELS), LEVELS.index(DIFFICULTY_CELLS[difficulty]))
+    session = MemoryGridSession(difficulty, seed, model=model)
     
-    # Select random cells to highlight based on difficulty
-    num_to_highlight = 3 if difficulty == "easy" else 5 if difficulty == "medium" else 7
-    highlighted_cells = select_random_cells(num_to_highlight)
-    
-    selected_cells = []
     showing_highlight = True
-    highlight_timer = 120  # 2 seconds at 60 FPS
+    highlight_timer = HIGHLIGHT_MS
     game_round += 1
 
-def generate_grid():
-    """Generate a 3x4 grid of cells"""
-    grid = []
-    
-    for row in range(3):
-        grid_row = []
-        for col in range(4):
-            grid_row.append({
-                "x": 0,
-                "y": 0,
-                "size": 0,
-                "highlighted": False,
-                "selected": False
-            })
-        
-        grid.append(grid_row)
-    
-    return grid
-
-def select_random_cells(num):
-    """Select a specified number of random cells"""
-    cells = []
-    
-    while len(cells) < num:
-        row = random.randint(0, 2)
-        col = random.randint(0, 3)
-        
-        cell = (row, col)
-        if cell not in cells:
-            cells.append(cell)
-    
-    return cells
-
 def draw_memory_grid(screen, font_medium, game_data):
     """Draw the memory grid game"""
-    global memory_grid, highlighted_cells, selected_cells, showing_highlight, highlight_timer
+    global drawn_state
     
     # Get screen dimensions
     screen_width, screen_height = screen.get_size()
     
-    # Calculate grid position and size
-    grid_width = screen_width * 0.8
-    grid_height = screen_height * 0.6
-    cell_width = grid_width // 4
-    cell_height = grid_height // 3
-    grid_x = (screen_width - grid_width) // 2
-    grid_y = (screen_height - grid_height) // 2 + 30
-    
-    # Update grid cells
-    for row in range(3):
-        for col in range(4):
-            memory_grid[row][col]["x"] = grid_x + col * cell_width
-            memory_grid[row][col]["y"] = grid_y + row * cell_height
-            memory_grid[row][col]["width"] = cell_width
-            memory_grid[row][col]["height"] = cell_height
+    # Get the cells of this window size
+    grid = memory_grid_layout(screen_width, screen_height)
+    cell_width, cell_height = grid.cell_width, grid.cell_height
     
     # Draw instruction
     if showing_highlight:
-        inst_text = font_medium.render("Remember the highlighted squares", True, (0, 0, 0))
+        inst_text = render_text(font_medium, "Remember the highlighted squares", (0, 0, 0))
     else:
-        inst_text = font_medium.render("Select the squares you saw highlighted", True, (0, 0, 0))
+        inst_text = render_text(font_medium, "Select the squares you saw highlighted", (0, 0, 0))
     
     inst_rect = inst_text.get_rect(center=(screen_width // 2, 100))
     screen.blit(inst_text, inst_rect)
     
-    # Draw grid cells
-    for row in range(3):
-        for col in range(4):
-            cell = memory_grid[row][col]
-            x = cell["x"]
-            y = cell["y"]
+    # Draw grid cells, the pattern while it is shown and the selection after
+    mask = session.highlighted if showing_highlight else session.selected
+    color = (255, 255, 0) if showing_highlight else (0, 0, 255)
+    for row in range(grid.rows):
+        for col in range(grid.cols):
+            cell_rect = grid.cells[row][col]
+            x, y = cell_rect.topleft
             
             # Draw cell background
-            cell_rect = pygame.Rect(x, y, cell_width, cell_height)
             pygame.draw.rect(screen, (240, 240, 240), cell_rect)
             pygame.draw.rect(screen, (0, 0, 0), cell_rect, 2)
             
-            # Draw highlight if showing highlights
-            if showing_highlight and (row, col) in highlighted_cells:
-                highlight_rect = pygame.Rect(x + 5, y + 5, cell_width - 10, cell_height - 10)
-                pygame.draw.rect(screen, (255, 255, 0), highlight_rect)
-            
-            # Draw selection if not showing highlights
-            if not showing_highlight and (row, col) in selected_cells:
-                select_rect = pygame.Rect(x + 5, y + 5, cell_width - 10, cell_height - 10)
-                pygame.draw.rect(screen, (0, 0, 255), select_rect)
+            if mask & cell_bit(row, col):
+                pygame.draw.rect(screen, color, (x + 5, y + 5, cell_width - 10, cell_height - 10))
+    
+    # Report the instruction and the grid when they changed since the last frame
+    state = (showing_highlight, session.highlighted, session.selected)
+    if state != drawn_state:
+        drawn_state = state
+        mark_dirty((0, inst_rect.top, screen_width, inst_rect.height))
+        mark_dirty(grid.rect)
+
+def update_memory_grid(dt):
+    """Advance the game by dt milliseconds"""
+    global showing_highlight, highlight_timer
     
-    # Update highlight timer
+    # Generate a few rounds of the player's level per step, so an answer never waits for a batch
+    session.top_up()
+    
+    # Hide the pattern once it was shown long enough
     if showing_highlight and highlight_timer > 0:
-        highlight_timer -= 1
+        highlight_timer = max(0, highlight_timer - dt)
         
         if highlight_timer == 0:
             showing_highlight = False
+            reaction.new_stimulus()
 
 def handle_memory_grid_events(event, game_data):
     """Handle events for the memory grid game"""
-    global memory_grid, selected_cells, showing_highlight
+    global showing_highlight
     
     # Only handle events if not showing highlights
     if not showing_highlight:
         # Handle mouse click
         if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
-            
-            # Check which cell was clicked
-            for row in range(3):
-                for col in range(4):
-                    cell = memory_grid[row][col]
-                    cell_rect = pygame.Rect(cell["x"], cell["y"], cell["width"], cell["height"])
-                    
-                    if cell_rect.collidepoint(mouse_pos):
-                        toggle_cell_selection(row, col, game_data)
-                        break
+            # Find the clicked cell of the current window size
+            cell = memory_grid_layout(*window_size()).cell_at(event.pos)
+            if cell:
+                toggle_cell_selection(*cell, game_data)
         
         # Handle keyboard
         elif event.type == pygame.KEYDOWN:
@@ -164,56 +123,32 @@ def handle_memory_grid_events(event, game_data):
 
 def toggle_cell_selection(row, col, game_data):
     """Toggle the selection state of a cell"""
-    global selected_cells
-    
-    cell = (row, col)
-    
-    if cell in selected_cells:
-        selected_cells.remove(cell)
-    else:
-        selected_cells.append(cell)
+    session.step((row, col))
 
 def check_selection(game_data):
     """Check if the selected cells match the highlighted cells and update score"""
-    global highlighted_cells, selected_cells
-    
-    # Calculate correct and incorrect selections
-    correct = 0
-    incorrect = 0
-    
-    for cell in selected_cells:
-        if cell in highlighted_cells:
-            correct += 1
-        else:
-            incorrect += 1
-    
-    for cell in highlighted_cells:
-        if cell not in selected_cells:
-            # Missed a highlighted cell
-            pass
-    
-    # Update score
-    game_data["score"] += correct * 5
-    game_data["score"] -= incorrect * 2
+    # Score the selection, the session moves on to the next round
+    num_highlighted = session.highlighted.bit_count()
+    level = session.level
+    result = session.step(SUBMIT)
+    game_data["score"] += result["points"]
+    
+    # Record the answer
+    response_ms, timing_error_ms = reaction.response()
+    report_trial("memory_grid", result["correct"], result["points"], response_ms,
+                 highlighted=num_highlighted, hits=result["hits"], misses=result["misses"],
+                 level=level, timing_error_ms=timing_error_ms)
     
     # Play sound
     from main import play_sound
-    play_sound(correct > 0)
+    play_sound(result["correct"])
     
     # Show feedback and start a new round
     show_feedback_and_restart()
 
 def show_feedback_and_restart():
     """Show feedback and start a new round"""
-    global memory_grid, highlighted_cells, selected_cells, showing_highlight, highlight_timer
-    
-    # Generate a new grid
-    memory_grid = generate_grid()
-    
-    # Select new cells to highlight
-    num_to_highlight = 3 if difficulty == "easy" else 5 if difficulty == "medium" else 7
-    highlighted_cells = select_random_cells(num_to_highlight)
+    global showing_highlight, highlight_timer
     
-    selected_cells = []
     showing_highlight = True
-    highlight_timer = 120  # 2 seconds at 60 FPS
\ No newline at end of file
+    highlight_timer = HIGHLIGHT_MS
\ No newline at end of file
@@ -1,174 +1,152 @@
 import pygame
 import random
 import math
+from utils.surface_cache import SurfaceCache
+from utils.dirty_rects import mark_dirty
+from utils.text_cache import render_text
+from utils.overlay_pool import get_overlay
+from utils.trials import report_trial
+from utils import reaction
+from utils.layout import shape_grid_layout, window_size
+from engine.shape_grid import ShapeGridSession, LEVELS, FEEDBACK_MS
+from engine.difficulty import DifficultyModel
 
 # Game variables
-shape_grid = []
+session = None
+model = None  # The player's difficulty model, kept across sessions
+shape_grid = ()  # (shape, color, rotation) of each cell of the round shown, row by row
 target_shape = ""
 target_color = ""
 selected_cell = None
 feedback_timer = 0
 feedback_correct = False
-shake_amount = 0
+shake_timer = 0
+shake_x = 0
+shake_y = 0
 target_text = ""
+drawn_state = None
 
-# Shape types
-SHAPES = ["circle", "square", "triangle", "star", "diamond"]
-COLORS = ["red", "blue", "green", "yellow", "purple"]
+# Map color names to RGB values
+COLOR_MAP = {
+    "red": (255, 0, 0),
+    "blue": (0, 0, 255),
+    "green": (0, 255, 0),
+    "yellow": (255, 255, 0),
+    "purple": (128, 0, 128)
+}
 
-def init_shape_grid():
-    """Initialize the shape grid game"""
-    global shape_grid, target_shape, target_color, selected_cell, feedback_timer, feedback_correct, shake_amount, target_text
-    
-    # Generate a new grid
-    shape_grid = generate_grid()
-    
-    # Select a random shape and color from the grid as target
-    target_shape, target_color = select_target_from_grid()
+# How long a wrong answer shakes the grid, in milliseconds, the answer stays colored for FEEDBACK_MS
+SHAKE_MS = 160
+SHAKE_PIXELS = 10
+
+# Rendered shape sprites keyed by (shape, color, rotation, size)
+sprite_cache = SurfaceCache(max_entries=200, max_bytes=4 * 1024 * 1024)
+
+def init_shape_grid(seed=None):
+    """Initialize the shape grid game, a seed makes its rounds reproducible"""
+    global session, selected_cell, feedback_timer, feedback_correct, shake_timer, shake_x, shake_y, model
     
-    # Create target text
-    target_text = f"Find: {target_shape.capitalize()}"
-    if random.random() < 0.5:  # 50% chance to include color
-        target_text += f" ({target_color.capitalize()})"
+    # Start a new session at the player's level and show its first round
+    if model is None:
+        model = DifficultyModel(len(LEVELS))
+    session = ShapeGridSession(seed, model=model)
+    handle_new_grid()
     
     selected_cell = None
     feedback_timer = 0
     feedback_correct = False
-    shake_amount = 0
-
-def generate_grid():
-    """Generate a 3x3 grid of random shapes"""
-    grid = []
-    
-    for row in range(3):
-        grid_row = []
-        for col in range(3):
-            # Random shape and color
-            shape = random.choice(SHAPES)
-            color = random.choice(COLORS)
-            
-            # Random rotation (0, 90, 180, 270 degrees)
-            rotation = random.choice([0, 90, 180, 270])
-            
-            grid_row.append({
-                "shape": shape,
-                "color": color,
-                "rotation": rotation,
-                "x": 0,
-                "y": 0,
-                "size": 0,
-                "highlighted": False
-            })
-        
-        grid.append(grid_row)
-    
-    return grid
-
-def select_target_from_grid():
-    """Select a random shape and color from the grid as target"""
-    global shape_grid
-    
-    # Flatten the grid to get all cells
-    all_cells = []
-    for row in shape_grid:
-        for cell in row:
-            all_cells.append(cell)
-    
-    # Select a random cell from the grid
-    target_cell = random.choice(all_cells)
-    
-    # Return the shape and color of the selected cell
-    return target_cell["shape"], target_cell["color"]
+    shake_timer = 0
+    shake_x = shake_y = 0
 
 def draw_shape_grid(screen, font_medium, game_data):
     """Draw the shape grid game"""
-    global shape_grid, target_shape, target_color, selected_cell, feedback_timer, feedback_correct, shake_amount, target_text
+    global shape_grid, target_shape, target_color, selected_cell, feedback_timer, feedback_correct, target_text, drawn_state
     
     # Get screen dimensions
     screen_width, screen_height = screen.get_size()
     
-    # Calculate grid position and size
-    grid_size = min(screen_width, screen_height) * 0.6
-    cell_size = grid_size // 3
-    grid_x = (screen_width - grid_size) // 2
-    grid_y = (screen_height - grid_size) // 2 + 30
-    
-    # Apply shake effect if needed
-    shake_x = 0
-    shake_y = 0
-    if shake_amount > 0:
-        shake_x = random.randint(-shake_amount, shake_amount)
-        shake_y = random.randint(-shake_amount, shake_amount)
-        shake_amount = max(0, shake_amount - 1)  # Ensure it doesn't go negative
+    # Get the cells of this window size
+    grid = shape_grid_layout(screen_width, screen_height)
+    cell_size = grid.cell_width
     
     # Draw target description
-    text = font_medium.render(target_text, True, (0, 0, 0))
+    text = render_text(font_medium, target_text, (0, 0, 0))
     text_rect = text.get_rect(center=(screen_width // 2, 90))
     screen.blit(text, text_rect)
     
     # Draw grid cells
-    for row in range(3):
-        for col in range(3):
-            # Calculate cell position
-            x = grid_x + col * cell_size + shake_x
-            y = grid_y + row * cell_size + shake_y
-            
-            # Update cell position
-            shape_grid[row][col]["x"] = x
-            shape_grid[row][col]["y"] = y
-            shape_grid[row][col]["size"] = cell_size
+    for row in range(grid.rows):
+        for col in range(grid.cols):
+            # Shift the cell by the shake
+            cell_rect = grid.cells[row][col]
+            if shake_x or shake_y:
+                cell_rect = cell_rect.move(shake_x, shake_y)
+            x, y = cell_rect.topleft
             
             # Draw cell background
-            cell_rect = pygame.Rect(x, y, cell_size, cell_size)
             pygame.draw.rect(screen, (240, 240, 240), cell_rect)
             pygame.draw.rect(screen, (0, 0, 0), cell_rect, 2)
             
             # Draw feedback if needed
             if feedback_timer > 0 and selected_cell == (row, col):
-                if feedback_correct:
-                    # Draw green overlay for correct
-                    overlay = pygame.Surface((cell_size, cell_size))
-                    overlay.set_alpha(100)
-                    overlay.fill((0, 200, 0))
-                    screen.blit(overlay, (x, y))
-                else:
-                    # Draw red overlay for incorrect
-                    overlay = pygame.Surface((cell_size, cell_size))
-                    overlay.set_alpha(100)
-                    overlay.fill((200, 0, 0))
-                    screen.blit(overlay, (x, y))
+                # Green overlay for correct, red for incorrect
+                color = (0, 200, 0) if feedback_correct else (200, 0, 0)
+                screen.blit(get_overlay((cell_size, cell_size), color, 100), (x, y))
             
             # Draw shape
-            draw_shape(screen, shape_grid[row][col], x + cell_size // 2, y + cell_size // 2, cell_size * 0.6)
+            draw_shape(screen, shape_grid[row * grid.cols + col], x + cell_size // 2, y + cell_size // 2, cell_size * 0.6)
     
-    # Decrease feedback timer after drawing
-    if feedback_timer > 0:
-        feedback_timer -= 1
-        # Only generate new grid when feedback is done
-        if feedback_timer == 0:
-            handle_new_grid()
+    # Report the target text and the grid (with room for the shake) when they changed
+    state = (id(shape_grid), target_text, feedback_timer > 0, selected_cell, shake_x, shake_y)
+    if state != drawn_state:
+        drawn_state = state
+        mark_dirty((0, text_rect.top, screen_width, text_rect.height))
+        mark_dirty(grid.rect.inflate(24, 24))
     
     # Draw instruction
-    inst_text = font_medium.render("Click on the matching shape", True, (0, 0, 0))
+    inst_text = render_text(font_medium, "Click on the matching shape", (0, 0, 0))
     inst_rect = inst_text.get_rect(center=(screen_width // 2, 135))
     screen.blit(inst_text, inst_rect)
 
+def update_shape_grid(dt):
+    """Advance the game by dt milliseconds"""
+    global feedback_timer, shake_timer, shake_x, shake_y
+    
+    # Generate a few rounds of the player's level per step, so an answer never waits for a batch
+    session.top_up()
+    
+    # Shake the grid less and less until the shake ends
+    if shake_timer > 0:
+        shake_timer = max(0, shake_timer - dt)
+        amount = math.ceil(SHAKE_PIXELS * shake_timer / SHAKE_MS)
+        shake_x = random.randint(-amount, amount)
+        shake_y = random.randint(-amount, amount)
+    
+    # Show the next round once the feedback is done
+    if feedback_timer > 0:
+        feedback_timer = max(0, feedback_timer - dt)
+        
+        if feedback_timer == 0:
+            handle_new_grid()
+
 def draw_shape(screen, shape_data, center_x, center_y, size):
-    """Draw a shape at the specified position"""
-    shape = shape_data["shape"]
-    color_name = shape_data["color"]
-    rotation = shape_data["rotation"]
+    """Draw a (shape, color, rotation) cell at the specified position"""
+    shape, color_name, rotation = shape_data
+    size = int(size)
     
-    # Map color names to RGB values
-    color_map = {
-        "red": (255, 0, 0),
-        "blue": (0, 0, 255),
-        "green": (0, 255, 0),
-        "yellow": (255, 255, 0),
-        "purple": (128, 0, 128)
-    }
+    # Reuse the pre-rendered sprite, the grid only changes once per round
+    shape_surface = sprite_cache.get(
+        (shape, color_name, rotation, size),
+        lambda: render_shape(shape, color_name, rotation, size)
+    )
     
-    color = color_map.get(color_name, (0, 0, 0))
+    # Draw the shape on the screen
+    shape_rect = shape_surface.get_rect(center=(center_x, center_y))
+    screen.blit(shape_surface, shape_rect)
+
+def render_shape(shape, color_name, rotation, size):
+    """Render a shape sprite of the given size onto a new surface"""
+    color = COLOR_MAP.get(color_name, (0, 0, 0))
     
     # Create a surface for the shape
     shape_surface = pygame.Surface((size, size), pygame.SRCALPHA)
@@ -214,13 +192,19 @@ def draw_shape(screen, shape_data, center_x, center_y, size):
     if rotation != 0:
         shape_surface = pygame.transform.rotate(shape_surface, -rotation)
     
-    # Draw the shape on the screen
-    shape_rect = shape_surface.get_rect(center=(center_x, center_y))
-    screen.blit(shape_surface, shape_rect)
+    return shape_surface
+
+def handle_resize():
+    """Drop sprites rendered for the old window size"""
+    sprite_cache.clear()
+
+def get_sprite_cache_stats():
+    """Get hit/miss counts of the shape sprite cache"""
+    return sprite_cache.stats()
 
 def handle_shape_grid_events(event, game_data):
     """Handle events for the shape grid game"""
-    global shape_grid, selected_cell, feedback_timer, feedback_correct, shake_amount, target_text
+    global shape_grid, selected_cell, feedback_timer, feedback_correct, target_text
     
     # Only handle clicks if no feedback is showing
     if feedback_timer > 0:
@@ -228,18 +212,11 @@ def handle_shape_grid_events(event, game_data):
     
     # Handle mouse click
     if event.type == pygame.MOUSEBUTTONDOWN:
-        mouse_pos = pygame.mouse.get_pos()
-        
-        # Check which cell was clicked
-        for row in range(3):
-            for col in range(3):
-                cell = shape_grid[row][col]
-                cell_rect = pygame.Rect(cell["x"], cell["y"], cell["size"], cell["size"])
-                
-                if cell_rect.collidepoint(mouse_pos):
-                    selected_cell = (row, col)
-                    check_selection(row, col, game_data)
-                    return
+        # Find the clicked cell of the current window size
+        cell = shape_grid_layout(*window_size()).cell_at(event.pos)
+        if cell:
+            selected_cell = cell
+            check_selection(*cell, game_data)
     
     # Handle keyboard
     elif event.type == pygame.KEYDOWN:
@@ -254,37 +231,27 @@ def handle_shape_grid_events(event, game_data):
 
 def check_selection(row, col, game_data):
     """Check if the selected cell matches the target and update score"""
-    global shape_grid, target_shape, target_color, feedback_timer, feedback_correct, shake_amount, target_text
-    
-    # Get the selected cell
-    cell = shape_grid[row][col]
+    global feedback_timer, feedback_correct, shake_timer
     
-    # Check if the cell matches the target
-    shape_match = cell["shape"] == target_shape
-    color_match = cell["color"] == target_color
+    # Score the selection, the session moves on to the next round which
+    # is shown once the feedback is done
+    include_color = session.include_color
+    level = session.level
+    result = session.step((row, col))
+    game_data["score"] += result["points"]
+    feedback_correct = result["correct"]
     
-    # Determine if the selection is correct
-    # If the target description includes color, both must match
-    # Otherwise, only the shape must match
-    if "(" in target_text and ")" in target_text:
-        # Target includes color
-        correct = shape_match and color_match
-    else:
-        # Target only includes shape
-        correct = shape_match
+    # Record the answer
+    response_ms, timing_error_ms = reaction.response()
+    report_trial("shape_grid", feedback_correct, result["points"], response_ms,
+                 target_shape=target_shape, target_color=target_color, include_color=include_color,
+                 row=row, col=col, level=level, timing_error_ms=timing_error_ms)
     
-    if correct:
-        # Correct selection
-        game_data["score"] += 15
-        feedback_correct = True
-    else:
-        # Incorrect selection
-        game_data["score"] = max(0, game_data["score"] - 5)  # Prevent negative score
-        feedback_correct = False
-        shake_amount = 10  # Shake effect
+    if not feedback_correct:
+        shake_timer = SHAKE_MS  # Shake effect
     
     # Set feedback timer
-    feedback_timer = 48  # 0.8 seconds at 60 FPS
+    feedback_timer = FEEDBACK_MS
     
     # Play sound
     try:
@@ -294,18 +261,13 @@ def check_selection(row, col, game_data):
         pass  # Skip if sound module not available
 
 def handle_new_grid():
-    """Generate a new grid and target for the next round"""
+    """Show the grid and target of the session's current round"""
     global shape_grid, target_shape, target_color, selected_cell, target_text
     
-    # Generate a new grid
-    shape_grid = generate_grid()
-    
-    # Select a random shape and color from the new grid as target
-    target_shape, target_color = select_target_from_grid()
-    
-    # Create target text
-    target_text = f"Find: {target_shape.capitalize()}"
-    if random.random() < 0.5:  # 50% chance to include color
-        target_text += f" ({target_color.capitalize()})"
+    shape_grid = session.cells
+    reaction.new_stimulus()
+    target_shape = session.target_shape
+    target_color = session.target_color
+    target_text = session.target_text()
     
     selected_cell = None
\ No newline at end of file
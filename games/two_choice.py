@@ -1,85 +1,59 @@
 import pygame
-import random
-import math
+from utils.dirty_rects import mark_dirty
+from utils.trials import report_trial
+from utils import reaction
+from engine.two_choice import TwoChoiceSession, LEVELS, FEEDBACK_MS
+from engine.difficulty import DifficultyModel
+from utils.text_cache import render_text
+from utils.overlay_pool import get_overlay
+from utils.layout import two_choice_layout, window_size
 
 # Game variables
+session = None
+model = None  # The player's difficulty model, kept across sessions
 two_choice_items = []
 selected_item = None
 feedback_timer = 0
 feedback_correct = False
+drawn_state = None
 
-def init_two_choice():
-    """Initialize the two choice game"""
-    global two_choice_items, selected_item, feedback_timer
-    
-    # Generate two random items
+def init_two_choice(seed=None):
+    """Initialize the two choice game, a seed makes its rounds reproducible"""
+    global session, two_choice_items, selected_item, feedback_timer, model
+    
+    # Start a new session with two random items as close as the player's level calls for
+    if model is None:
+        model = DifficultyModel(len(LEVELS))
+    session = TwoChoiceSession(seed, model=model)
     two_choice_items = generate_items()
+    reaction.new_stimulus()
     selected_item = None
     feedback_timer = 0
 
 def generate_items():
-    """Generate two random items for the player to choose from"""
+    """Create the two items of the current round for the player to choose from"""
     items = []
     
-    # Decide whether to use numbers or shapes
-    use_numbers = True
-    
-    if use_numbers:
-        # Generate two numbers
-        num1 = random.randint(1, 100)
-        num2 = random.randint(1, 100)
-        
-        # Create items with numbers
-        items.append({
-            "type": "number",
-            "value": num1,
-            "display": str(num1),
-            "x": 0,
-            "y": 0,
-            "width": 0,
-            "height": 0
-        })
-        
+    # Create items with numbers
+    for value in session.values:
         items.append({
             "type": "number",
-            "value": num2,
-            "display": str(num2),
-            "x": 0,
-            "y": 0,
-            "width": 0,
-            "height": 0
+            "value": value,
+            "display": str(value)
         })
     return items
 
 def draw_two_choice(screen, font_medium, game_data):
     """Draw the two choice game"""
-    global two_choice_items, selected_item, feedback_timer, feedback_correct
+    global two_choice_items, selected_item, feedback_correct, drawn_state
     
     # Get screen dimensions
     screen_width, screen_height = screen.get_size()
     
-    # Calculate positions
-    box_width, box_height = 200, 200
-    box_y = 150
-    
-    # Left box
-    left_x = screen_width // 2 - box_width - 50
-    left_rect = pygame.Rect(left_x, box_y, box_width, box_height)
-    
-    # Right box
-    right_x = screen_width // 2 + 50
-    right_rect = pygame.Rect(right_x, box_y, box_width, box_height)
-    
-    # Update item positions
-    two_choice_items[0]["x"] = left_x
-    two_choice_items[0]["y"] = box_y
-    two_choice_items[0]["width"] = box_width
-    two_choice_items[0]["height"] = box_height
-    
-    two_choice_items[1]["x"] = right_x
-    two_choice_items[1]["y"] = box_y
-    two_choice_items[1]["width"] = box_width
-    two_choice_items[1]["height"] = box_height
+    # Get the boxes of this window size
+    boxes = two_choice_layout(screen_width, screen_height)
+    left_rect, right_rect = boxes
+    box_width, box_height = left_rect.size
     
     # Draw boxes
     pygame.draw.rect(screen, (240, 240, 240), left_rect)
@@ -90,38 +64,25 @@ def draw_two_choice(screen, font_medium, game_data):
     
     # Draw feedback if needed
     if feedback_timer > 0:
-        feedback_timer -= 1
+        # Green overlay for correct, red for incorrect
+        color = (0, 200, 0) if feedback_correct else (200, 0, 0)
+        overlay = get_overlay((box_width, box_height), color)
         
-        if feedback_correct:
-            # Draw green overlay for correct
-            overlay = pygame.Surface((box_width, box_height))
-            overlay.fill((0, 200, 0))
-            
-            if selected_item == 0:
-                screen.blit(overlay, (left_x, box_y))
-            else:
-                screen.blit(overlay, (right_x, box_y))
+        if selected_item == 0:
+            screen.blit(overlay, left_rect.topleft)
         else:
-            # Draw red overlay for incorrect
-            overlay = pygame.Surface((box_width, box_height))
-            overlay.fill((200, 0, 0))
-            
-            if selected_item == 0:
-                screen.blit(overlay, (left_x, box_y))
-            else:
-                screen.blit(overlay, (right_x, box_y))
+            screen.blit(overlay, right_rect.topleft)
     
     # Draw items
-    for i, item in enumerate(two_choice_items):
+    for item, box in zip(two_choice_items, boxes):
         if item["type"] == "number":
             # Draw number
-            text = font_medium.render(item["display"], True, (0, 0, 0))
-            text_rect = text.get_rect(center=(item["x"] + item["width"] // 2, item["y"] + item["height"] // 2))
+            text = render_text(font_medium, item["display"], (0, 0, 0))
+            text_rect = text.get_rect(center=box.center)
             screen.blit(text, text_rect)
         else:
             # Draw shape
-            center_x = item["x"] + item["width"] // 2
-            center_y = item["y"] + item["height"] // 2
+            center_x, center_y = box.center
             
             if item["shape"] == "circle":
                 pygame.draw.circle(screen, (0, 0, 200), (center_x, center_y), item["size"] // 2)
@@ -137,19 +98,40 @@ def draw_two_choice(screen, font_medium, game_data):
                 pygame.draw.polygon(screen, (0, 200, 0), points)
             
             # Draw shape name
-            text = font_medium.render(item["display"], True, (0, 0, 0))
-            text_rect = text.get_rect(center=(center_x, item["y"] + item["height"] - 30))
+            text = render_text(font_medium, item["display"], (0, 0, 0))
+            text_rect = text.get_rect(center=(center_x, box.bottom - 30))
             screen.blit(text, text_rect)
     
     # Draw instruction
-    inst_text = font_medium.render("Select the larger item", True, (0, 0, 0))
+    inst_text = render_text(font_medium, "Select the larger item", (0, 0, 0))
     inst_rect = inst_text.get_rect(center=(screen_width // 2, 100))
     screen.blit(inst_text, inst_rect)
     
     # Draw keyboard hint
-    hint_text = font_medium.render("Use LEFT/RIGHT arrows or click to select", True, (100, 100, 100))
+    hint_text = render_text(font_medium, "Use LEFT/RIGHT arrows or click to select", (100, 100, 100))
     hint_rect = hint_text.get_rect(center=(screen_width // 2, 400))
     screen.blit(hint_text, hint_rect)
+    
+    # Report the boxes only when their content changed since the last frame
+    state = (two_choice_items[0]["value"], two_choice_items[1]["value"], feedback_timer > 0, feedback_correct, selected_item)
+    if state != drawn_state:
+        drawn_state = state
+        mark_dirty(left_rect)
+        mark_dirty(right_rect)
+
+def update_two_choice(dt):
+    """Advance the game by dt milliseconds"""
+    global feedback_timer
+    
+    # Generate a few rounds of the player's level per step, so an answer never waits for a batch
+    session.top_up()
+    
+    if feedback_timer > 0:
+        feedback_timer = max(0, feedback_timer - dt)
+        
+        # The next numbers can be answered from now on, time the answer from here
+        if feedback_timer == 0:
+            reaction.new_stimulus()
 
 def handle_two_choice_events(event, game_data):
     """Handle events for the two choice game"""
@@ -157,15 +139,10 @@ def handle_two_choice_events(event, game_data):
     
     # Handle mouse click
     if event.type == pygame.MOUSEBUTTONDOWN and feedback_timer == 0:
-        mouse_pos = pygame.mouse.get_pos()
-        
-        # Check if left item was clicked
-        left_rect = pygame.Rect(two_choice_items[0]["x"], two_choice_items[0]["y"], 
-                               two_choice_items[0]["width"], two_choice_items[0]["height"])
+        mouse_pos = event.pos
         
-        # Check if right item was clicked
-        right_rect = pygame.Rect(two_choice_items[1]["x"], two_choice_items[1]["y"], 
-                                two_choice_items[1]["width"], two_choice_items[1]["height"])
+        # Check which box of the current window size was clicked
+        left_rect, right_rect = two_choice_layout(*window_size())
         
         if left_rect.collidepoint(mouse_pos):
             selected_item = 0
@@ -187,40 +164,22 @@ def check_selection(game_data):
     """Check if the selected item is correct and update score"""
     global two_choice_items, selected_item, feedback_timer, feedback_correct
     
-    # Get values of the two items
-    value1 = two_choice_items[0]["value"]
-    value2 = two_choice_items[1]["value"]
-    
-    # Determine which item is larger
-    larger_item = 0 if value1 > value2 else 1
-    
-    # Check if selection is correct
-    if selected_item == larger_item:
-        # Correct selection
-        game_data["score"] += 10
-        feedback_correct = True
-        init_two_choice()
-	
-    else:
-        # Incorrect selection
-        game_data["score"] -= 5
-        feedback_correct = False
-        init_two_choice()
-    
-    # Set feedback timer
-    feedback_timer = 30  # 0.5 seconds at 60 FPS
+    # Score the selection, the session moves on to the next round
+    left, right = session.values
+    level = session.level
+    result = session.step(selected_item)
+    game_data["score"] += result["points"]
+    feedback_correct = result["correct"]
+    two_choice_items = generate_items()
     
-    # Play sound
-    from main import play_sound
-    play_sound(feedback_correct)
+    # Record the answer, timed from the flip that showed the numbers to the input event
+    response_ms, timing_error_ms = reaction.response()
+    report_trial("two_choice", feedback_correct, result["points"], response_ms,
+                 left=left, right=right, choice=selected_item, level=level, timing_error_ms=timing_error_ms)
     
-    # Generate new items after a short delay
-    import pygame
-    pygame.time.set_timer(pygame.USEREVENT + 1, 500)
-
-def handle_new_items():
-    """Generate new items for the next round"""
-    global two_choice_items, selected_item
+    # Set feedback timer, input is ignored until it runs out
+    feedback_timer = FEEDBACK_MS
     
-    two_choice_items = generate_items()
-    selected_item = None
\ No newline at end of file
+    # Play sound
+    from main import play_sound
+    play_sound(feedback_correct)
\ No newline at end of file
@@ -1,21 +1,64 @@
-import pygame
 import sys
-import json
-import os
+from utils import startup
+
+# Time every import from here on when measuring startup
+STARTUP_PROFILE = "--startup-profile" in sys.argv
+if STARTUP_PROFILE:
+    startup.track_imports()
+
+import pygame
 import random
+import importlib
+import threading
 from screens.menu import draw_menu, handle_menu_events
 from screens.rules_modal import draw_rules_modal, handle_rules_modal_events
-from games.two_choice import draw_two_choice, handle_two_choice_events, init_two_choice, handle_new_items as handle_two_choice_new_items
-from games.shape_grid import draw_shape_grid, handle_shape_grid_events, init_shape_grid, handle_new_grid as handle_shape_grid_new_grid
-from games.memory_grid import draw_memory_grid, handle_memory_grid_events, init_memory_grid
-from utils.timer import Timer
+from utils.timer import Timer, set_frame_ticks, clock_ticks, precise_ticks
+from utils.clock import GameClock, STEP_MS
+from utils import dirty_rects
+from utils.text_cache import render_text, get_text_cache_stats
+from utils.layer_cache import get_layer, clear_layers
+from utils.overlay_pool import get_overlay, clear_overlays
+from utils.layout import top_bar_layout, game_over_layout, clear_layouts
+from utils.profiler import FrameProfiler
+from utils.persistence import HighscoreStore
+from utils.trials import add_trial_listener
+from utils.replay import InputRecorder, InputReplayer
+from utils.assets import AssetManager
+from utils import reaction
+
+startup.mark("imports")
 
-pygame.init()
-pygame.mixer.init()
+def get_option(name):
+    """Get the value following a command line flag, or None"""
+    if name in sys.argv[:-1]:
+        return sys.argv[sys.argv.index(name) + 1]
+    return None
 
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-FPS = 60
+FPS = int(get_option("--fps") or 60)  # Render rate, 0 renders as fast as possible, the game runs at the same speed
+DIRTY_RECTS = True  # Push only changed regions, False always flips the whole window
+PROFILE = "--profile" in sys.argv  # Time each phase of the frame, F3 shows the overlay
+PROFILE_PATH = "data/frame_profile.json"
+HIGHSCORES_PATH = "data/highscores.json"
+HISTORY_PATH = "data/history.sqlite3"
+STATS_PATH = "data/stats.json"
+ICON_PATH = "assets/icon.ico"
+SOUND_SUCCESS_PATH = "assets/sound_success.wav"
+SOUND_FAIL_PATH = "assets/sound_fail.wav"
+RECORD_PATH = get_option("--record")  # Save the input of the session to replay it later
+REPLAY_PATH = get_option("--replay")  # Play a recorded session back instead of reading input
+FAST_REPLAY = "--fast" in sys.argv  # Replay as fast as possible without showing the frames
+LOW_LATENCY = "--low-latency" in sys.argv  # Handle input the moment it arrives instead of at the next frame
+VSYNC = "--vsync" in sys.argv  # Open a scaled window that flips in sync with the display
+BUSY_WAIT = get_option("--pacing") == "busy"  # Poll for input until the next frame instead of sleeping
+INPUT_EVENTS = [pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN]
+
+DEFAULT_HIGHSCORES = {
+    "two_choice": 0,
+    "shape_grid": 0,
+    "memory_grid": 0
+}
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -34,6 +77,38 @@ STATE_SHAPE_GRID = "shape_grid"
 STATE_MEMORY_GRID = "memory_grid"
 STATE_GAME_OVER = "game_over"
 
+# Game modules, imported in the background once the menu is shown
+GAME_MODULES = {
+    STATE_TWO_CHOICE: "games.two_choice",
+    STATE_SHAPE_GRID: "games.shape_grid",
+    STATE_MEMORY_GRID: "games.memory_grid"
+}
+
+# Screens that show the top bar and its buttons
+TOP_BAR_STATES = [STATE_TWO_CHOICE, STATE_SHAPE_GRID, STATE_MEMORY_GRID, STATE_GAME_OVER]
+
+# Screens that only change when the player does something, the loop sleeps on them
+IDLE_STATES = [STATE_MENU, STATE_RULES, STATE_GAME_OVER]
+IDLE_TIMEOUT_MS = 1000  # Longest sleep while waiting for an event
+
+# Profiler phase names of the state-specific draw functions
+DRAW_PHASES = {
+    STATE_MENU: "menu",
+    STATE_RULES: "rules_modal",
+    STATE_TWO_CHOICE: "two_choice",
+    STATE_SHAPE_GRID: "shape_grid",
+    STATE_MEMORY_GRID: "memory_grid",
+    STATE_GAME_OVER: "game_over"
+}
+
+GAME_OVER_TIPS = [
+    "Tip: Focus on accuracy over speed!",
+    "Tip: Take a deep breath before starting.",
+    "Tip: Practice makes perfect!",
+    "Tip: Stay calm and maintain focus.",
+    "Tip: Try to remember patterns, not individual items."
+]
+
 screen = None
 clock = None
 font_small = None
@@ -44,73 +119,120 @@ selected_game = None
 game_data = {}
 timer = None
 highscores = {}
-sound_enabled = True
-difficulty = "hard"
+highscore_store = None
+stats = None  # Live statistics of the local player, loaded in the background
+stats_store = None
+history = None
+sound_enabled = not FAST_REPLAY
+top_bar_drawn_state = None
+game_over_tip = GAME_OVER_TIPS[0]
+drawn_state = None
+profiler = FrameProfiler(enabled=PROFILE)
+session_seeds = random.Random()
+recorder = None
+replayer = None
+waited_events = []  # input taken from the queue while waiting for the next frame
 
-try:
-    sound_success = pygame.mixer.Sound("assets/sound_success.wav")
-    sound_fail = pygame.mixer.Sound("assets/sound_fail.wav")
-except:
-    sound_success = None
-    sound_fail = None
+assets = AssetManager()
+loader = None
 
 def load_highscores():
     """Load high scores from JSON file"""
-    global highscores
-    try:
-        if os.path.exists("data/highscores.json"):
-            with open("data/highscores.json", "r") as f:
-                highscores = json.load(f)
-        else:
-            # Create default highscores
-            highscores = {
-                "two_choice": 0,
-                "shape_grid": 0,
-                "memory_grid": 0
-            }
-            save_highscores()
-    except:
-        highscores = {
-            "two_choice": 0,
-            "shape_grid": 0,
-            "memory_grid": 0
-        }
+    global highscores, highscore_store
+    
+    if highscore_store is None:
+        highscore_store = HighscoreStore(HIGHSCORES_PATH, DEFAULT_HIGHSCORES)
+    
+    # Create default highscores if there is no file yet
+    is_new = not highscore_store.exists()
+    highscores = highscore_store.load()
+    if is_new:
+        save_highscores()
 
 def save_highscores():
-    """Save high scores to JSON file"""
-    global highscores
-    try:
-        os.makedirs("data", exist_ok=True)
-        with open("data/highscores.json", "w") as f:
-            json.dump(highscores, f)
-    except:
-        pass
+    """Save high scores to JSON file in the background"""
+    global highscores, highscore_store
+    
+    # A replay never overwrites the player's scores
+    if REPLAY_PATH:
+        return
+    
+    if highscore_store is None:
+        highscore_store = HighscoreStore(HIGHSCORES_PATH, DEFAULT_HIGHSCORES)
+    highscore_store.save(highscores)
 
 def update_highscore(game, score):
-    """Update high score if current score is higher"""
+    """Update high score if current score is higher and count the session in the statistics"""
     global highscores
     if score > highscores.get(game, 0):
         highscores[game] = score
         save_highscores()
+    
+    # Every finished session counts in the statistics, not only a new best
+    if stats:
+        stats.end_session(game, score)
+        stats_store.save(stats.to_dict())
 
 def play_sound(success):
     """Play success or fail sound if enabled"""
-    global sound_enabled, sound_success, sound_fail
+    global sound_enabled
     if sound_enabled:
+        # A sound still loading or that failed to load is skipped
+        sound = assets.ready(SOUND_SUCCESS_PATH if success else SOUND_FAIL_PATH)
         try:
-            if success and sound_success:
-                sound_success.play()
-            elif not success and sound_fail:
-                sound_fail.play()
+            if sound:
+                sound.play()
         except:
             pass
 
+def load_game(state):
+    """Get the module of a game, importing it if it isn't loaded yet"""
+    return importlib.import_module(GAME_MODULES[state])
+
+def load_in_background():
+    """Load what the menu doesn't need: the sounds, the game modules, the history and the statistics"""
+    global history, stats, stats_store
+    
+    # The sounds load on the asset threads while the game modules are imported
+    try:
+        pygame.mixer.init()
+        assets.load_sound(SOUND_SUCCESS_PATH)
+        assets.load_sound(SOUND_FAIL_PATH)
+    except:
+        pass
+    startup.mark("mixer init (background)")
+    
+    for state in GAME_MODULES:
+        load_game(state)
+    startup.mark("game modules (background)")
+    
+    # Record every answer in the session history, except the answers of a replay
+    if not replayer:
+        from utils.history import HistoryStore
+        history = HistoryStore(HISTORY_PATH)
+        add_trial_listener(history.record_trial)
+    startup.mark("history (background)")
+    
+    # Keep the live statistics, a replay leaves them alone too
+    if not replayer:
+        from utils.stats import StreamingStats, open_stats_store
+        stats_store = open_stats_store(STATS_PATH)
+        stats = StreamingStats(stats_store.load())
+        add_trial_listener(stats.record_trial)
+    startup.mark("statistics (background)")
+
+def finish_loading():
+    """Wait until the background loading is done"""
+    if loader:
+        loader.join()
+
 def draw_top_bar():
     """Draw the top bar with game title, timer, score, mute button and rules button"""
-    global screen, font_medium, font_small, timer, game_data, sound_enabled
+    global screen, font_medium, font_small, timer, game_data, sound_enabled, top_bar_drawn_state
     
     # Draw background
-    pygame.draw.rect(screen, DARK_GRAY, (0, 0, SCREEN_WIDTH, 50))
+    layout = top_bar_layout(SCREEN_WIDTH)
+    pygame.draw.rect(screen, DARK_GRAY, layout["bar"])
     
     # Draw game title
     if current_state in [STATE_TWO_CHOICE, STATE_SHAPE_GRID, STATE_MEMORY_GRID]:
@@ -122,127 +244,153 @@ def draw_top_bar():
         elif current_state == STATE_MEMORY_GRID:
             title = "Memory Recall"
             
-        title_text = font_medium.render(title, True, WHITE)
+        title_text = render_text(font_medium, title, WHITE)
         screen.blit(title_text, (20, 15))
     
     # Draw timer
+    bar_state = None
     if timer:
         time_left = max(0, timer.get_time_left())
         minutes = int(time_left // 60)
         seconds = int(time_left % 60)
-        timer_text = font_medium.render(f"{minutes:02d}:{seconds:02d}", True, WHITE)
-        screen.blit(timer_text, (SCREEN_WIDTH // 2 - 40, 15))
+        timer_text = render_text(font_medium, f"{minutes:02d}:{seconds:02d}", WHITE)
+        screen.blit(timer_text, layout["timer"])
         
         # Draw timer progress bar
-        bar_width = 200
-        bar_height = 10
-        bar_x = SCREEN_WIDTH // 2 - bar_width // 2
-        bar_y = 40
+        bar_x, bar_y, bar_width, bar_height = layout["progress"]
         
-        pygame.draw.rect(screen, GRAY, (bar_x, bar_y, bar_width, bar_height))
+        pygame.draw.rect(screen, GRAY, layout["progress"])
         
         progress = time_left / 30  # 30 seconds total
         progress_width = int(bar_width * progress)
         pygame.draw.rect(screen, GREEN if progress > 0.3 else RED, (bar_x, bar_y, progress_width, bar_height))
+        bar_state = (minutes, seconds, progress_width, progress > 0.3)
     
     # Draw score
     if "score" in game_data:
-        score_text = font_medium.render(f"Score: {game_data['score']}", True, WHITE)
-        screen.blit(score_text, (SCREEN_WIDTH - 250, 15))
+        score_text = render_text(font_medium, f"Score: {game_data['score']}", WHITE)
+        screen.blit(score_text, layout["score"])
     
     # Draw rules button
     rules_text = "?"
-    rules_button = font_medium.render(rules_text, True, WHITE)
-    screen.blit(rules_button, (SCREEN_WIDTH - 100, 15))
+    rules_button = render_text(font_medium, rules_text, WHITE)
+    screen.blit(rules_button, layout["rules"].topleft)
+    
+    # Report the bar only when the timer or the score changed
+    state = (current_state, bar_state, game_data.get("score"))
+    if state != top_bar_drawn_state:
+        top_bar_drawn_state = state
+        dirty_rects.mark_dirty(layout["bar"])
 
 def draw_game_over():
     """Draw game over screen with score and options"""
     global screen, font_large, font_medium, font_small, game_data, highscores
     
-    # Draw semi-transparent overlay
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-    overlay.set_alpha(200)
-    overlay.fill(BLACK)
-    screen.blit(overlay, (0, 0))
+    # Blit the screen composed for this result and window size
+    score = game_data.get('score', 0)
+    highscore = highscores.get(selected_game, 0)
+    layer = get_layer(
+        "game_over",
+        (selected_game, score, highscore, game_over_tip, SCREEN_WIDTH, SCREEN_HEIGHT),
+        lambda: compose_game_over(score, highscore, game_over_tip)
+    )
+    screen.blit(layer, (0, 0))
+    
+    return get_game_over_buttons()
+
+def compose_game_over(score, highscore, tip):
+    """Compose the overlay, box, labels and buttons of the game over screen onto one surface"""
+    # Start from a copy of the semi-transparent overlay
+    layer = get_overlay((SCREEN_WIDTH, SCREEN_HEIGHT), (*BLACK, 200)).copy()
     
     # Draw game over box
-    box_width, box_height = 500, 300
-    box_x = (SCREEN_WIDTH - box_width) // 2
-    box_y = (SCREEN_HEIGHT - box_height) // 2
+    layout = game_over_layout(SCREEN_WIDTH, SCREEN_HEIGHT)
+    box_y = layout["box"].y
     
-    pygame.draw.rect(screen, WHITE, (box_x, box_y, box_width, box_height))
-    pygame.draw.rect(screen, BLACK, (box_x, box_y, box_width, box_height), 2)
+    pygame.draw.rect(layer, WHITE, layout["box"])
+    pygame.draw.rect(layer, BLACK, layout["box"], 2)
     
     # Draw title
-    title_text = font_large.render("Game Over!", True, BLACK)
+    title_text = render_text(font_large, "Game Over!", BLACK)
     title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, box_y + 50))
-    screen.blit(title_text, title_rect)
+    layer.blit(title_text, title_rect)
     
     # Draw score
-    score_text = font_medium.render(f"Your Score: {game_data.get('score', 0)}", True, BLACK)
+    score_text = render_text(font_medium, f"Your Score: {score}", BLACK)
     score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, box_y + 100))
-    screen.blit(score_text, score_rect)
+    layer.blit(score_text, score_rect)
     
     # Draw high score
-    highscore = highscores.get(selected_game, 0)
-    highscore_text = font_medium.render(f"Best Score: {highscore}", True, BLACK)
+    highscore_text = render_text(font_medium, f"Best Score: {highscore}", BLACK)
     highscore_rect = highscore_text.get_rect(center=(SCREEN_WIDTH // 2, box_y + 140))
-    screen.blit(highscore_text, highscore_rect)
+    layer.blit(highscore_text, highscore_rect)
     
     # Draw tip
-    tips = [
-        "Tip: Focus on accuracy over speed!",
-        "Tip: Take a deep breath before starting.",
-        "Tip: Practice makes perfect!",
-        "Tip: Stay calm and maintain focus.",
-        "Tip: Try to remember patterns, not individual items."
-    ]
-    tip = random.choice(tips)
-    tip_text = font_small.render(tip, True, DARK_GRAY)
+    tip_text = render_text(font_small, tip, DARK_GRAY)
     tip_rect = tip_text.get_rect(center=(SCREEN_WIDTH // 2, box_y + 180))
-    screen.blit(tip_text, tip_rect)
+    layer.blit(tip_text, tip_rect)
     
     # Draw buttons
-    replay_button = pygame.Rect(SCREEN_WIDTH // 2 - 220, box_y + 220, 200, 50)
-    menu_button = pygame.Rect(SCREEN_WIDTH // 2 + 20, box_y + 220, 200, 50)
+    replay_button, menu_button = get_game_over_buttons()
     
-    pygame.draw.rect(screen, GREEN, replay_button)
-    pygame.draw.rect(screen, BLUE, menu_button)
+    pygame.draw.rect(layer, GREEN, replay_button)
+    pygame.draw.rect(layer, BLUE, menu_button)
     
-    pygame.draw.rect(screen, BLACK, replay_button, 2)
-    pygame.draw.rect(screen, BLACK, menu_button, 2)
+    pygame.draw.rect(layer, BLACK, replay_button, 2)
+    pygame.draw.rect(layer, BLACK, menu_button, 2)
     
-    replay_text = font_medium.render("Replay", True, WHITE)
-    menu_text = font_medium.render("Back to Menu", True, WHITE)
+    replay_text = render_text(font_medium, "Replay", WHITE)
+    menu_text = render_text(font_medium, "Back to Menu", WHITE)
     
     replay_text_rect = replay_text.get_rect(center=replay_button.center)
     menu_text_rect = menu_text.get_rect(center=menu_button.center)
     
-    screen.blit(replay_text, replay_text_rect)
-    screen.blit(menu_text, menu_text_rect)
+    layer.blit(replay_text, replay_text_rect)
+    layer.blit(menu_text, menu_text_rect)
     
-    return replay_button, menu_button
+    return layer
+
+def get_game_over_buttons():
+    """Get the replay and menu button rects of the game over screen"""
+    layout = game_over_layout(SCREEN_WIDTH, SCREEN_HEIGHT)
+    return layout["replay"], layout["menu"]
+
+def start_game():
+    """Start a new session of the selected game"""
+    global current_state, timer, game_data
+    
+    # The game modules and the history are loaded in the background, usually long before this
+    finish_loading()
+    
+    timer = Timer(30)  # 30 seconds timer
+    game_data = {"score": 0}
+    
+    # Each session gets its own seed, derived from the seed of the run
+    seed = session_seeds.getrandbits(64)
+    if selected_game == STATE_TWO_CHOICE:
+        load_game(STATE_TWO_CHOICE).init_two_choice(seed)
+    elif selected_game == STATE_SHAPE_GRID:
+        load_game(STATE_SHAPE_GRID).init_shape_grid(seed)
+    elif selected_game == STATE_MEMORY_GRID:
+        load_game(STATE_MEMORY_GRID).init_memory_grid(seed)
+    
+    if history:
+        history.start_session(selected_game)
+    
+    # The idle screen before didn't advance the clock, the first frame of the game runs no backlog steps
+    clock.reset()
+    current_state = selected_game
 
 def handle_game_over_events(event, replay_button, menu_button):
     """Handle events for game over screen"""
-    global current_state, selected_game, timer
+    global current_state, selected_game
     
     if event.type == pygame.MOUSEBUTTONDOWN:
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = event.pos
         
         if replay_button.collidepoint(mouse_pos):
             # Start the same game again
-            timer = Timer(30)  # 30 seconds timer
-            game_data = {"score": 0}
-            
-            if selected_game == STATE_TWO_CHOICE:
-                init_two_choice()
-            elif selected_game == STATE_SHAPE_GRID:
-                init_shape_grid()
-            elif selected_game == STATE_MEMORY_GRID:
-                init_memory_grid()
-                
-            current_state = selected_game
+            start_game()
             
         elif menu_button.collidepoint(mouse_pos):
             # Go back to menu
@@ -251,53 +399,278 @@ def handle_game_over_events(event, replay_button, menu_button):
     elif event.type == pygame.KEYDOWN:
         if event.key == pygame.K_r:
             # Start the same game again
-            timer = Timer(30)  # 30 seconds timer
-            game_data = {"score": 0}
-            
-            if selected_game == STATE_TWO_CHOICE:
-                init_two_choice()
-            elif selected_game == STATE_SHAPE_GRID:
-                init_shape_grid()
-            elif selected_game == STATE_MEMORY_GRID:
-                init_memory_grid()
-                
-            current_state = selected_game
+            start_game()
             
         elif event.key == pygame.K_ESCAPE or event.key == pygame.K_m:
             # Go back to menu
             current_state = STATE_MENU
 
 def handle_top_bar_events(event):
-    """Handle events for the top bar buttons"""
+    """Handle events for the top bar buttons, return True if a button took the event"""
     global sound_enabled, current_state, selected_game
     
     if event.type == pygame.MOUSEBUTTONDOWN:
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = event.pos
+        layout = top_bar_layout(SCREEN_WIDTH)
         
         # Check mute button
-        mute_button_rect = pygame.Rect(SCREEN_WIDTH - 50, 15, 30, 30)
-        if mute_button_rect.collidepoint(mouse_pos):
+        if layout["mute"].collidepoint(mouse_pos):
             sound_enabled = not sound_enabled
-            return
+            return True
         
         # Check rules button
-        rules_button_rect = pygame.Rect(SCREEN_WIDTH - 100, 15, 30, 30)
-        if rules_button_rect.collidepoint(mouse_pos) and current_state in [STATE_TWO_CHOICE, STATE_SHAPE_GRID, STATE_MEMORY_GRID]:
+        if layout["rules"].collidepoint(mouse_pos) and current_state in [STATE_TWO_CHOICE, STATE_SHAPE_GRID, STATE_MEMORY_GRID]:
             current_state = STATE_RULES
+            return True
+    return False
+
+def set_display_mode(size):
+    """Open the window, scaled and flipped in sync with the display with --vsync"""
+    if VSYNC:
+        try:
+            return pygame.display.set_mode(size, pygame.SCALED, vsync=1)
+        except pygame.error:
+            pass  # The renderer can't sync, fall back to a plain window
+    return pygame.display.set_mode(size, pygame.RESIZABLE)
+
+def handle_event(event):
+    """Handle one event, return False when the game should quit"""
+    global screen, current_state, selected_game, SCREEN_WIDTH, SCREEN_HEIGHT
+    
+    if event.type == pygame.QUIT:
+        return False
+        
+    elif event.type == pygame.VIDEORESIZE:
+        # Handle window resize
+        SCREEN_WIDTH, SCREEN_HEIGHT = event.w, event.h
+        screen = set_display_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        if GAME_MODULES[STATE_SHAPE_GRID] in sys.modules:
+            load_game(STATE_SHAPE_GRID).handle_resize()
+        clear_layers()
+        clear_overlays()
+        clear_layouts()
+        dirty_rects.mark_full()
+        
+    elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+        # The window has to be shown again, e.g. after being uncovered
+        dirty_rects.mark_full()
+        
+    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and profiler.enabled:
+        # Show or hide the frame time overlay
+        profiler.toggle_overlay()
+        dirty_rects.mark_full()
+        
+    else:
+        # Answers given with this event are timed by its stamp
+        reaction.set_input(event)
+        
+        # Handle top bar events, a click on one of its buttons goes no further
+        if current_state in TOP_BAR_STATES and handle_top_bar_events(event):
+            return True
+        
+        # Handle state-specific events
+        if current_state == STATE_MENU:
+            new_state = handle_menu_events(event, highscores)
+            if new_state and new_state != current_state:
+                selected_game = new_state
+                current_state = STATE_RULES
+                
+        elif current_state == STATE_RULES:
+            new_state = handle_rules_modal_events(event)
+            if new_state and new_state != current_state:
+                if new_state == "start":
+                    # Start the selected game
+                    start_game()
+                else:
+                    # Go back to menu
+                    current_state = STATE_MENU
+                    
+        elif current_state == STATE_TWO_CHOICE:
+            load_game(STATE_TWO_CHOICE).handle_two_choice_events(event, game_data)
+            
+        elif current_state == STATE_SHAPE_GRID:
+            load_game(STATE_SHAPE_GRID).handle_shape_grid_events(event, game_data)
+            
+        elif current_state == STATE_MEMORY_GRID:
+            load_game(STATE_MEMORY_GRID).handle_memory_grid_events(event, game_data)
+            
+        elif current_state == STATE_GAME_OVER:
+            replay_button, menu_button = get_game_over_buttons()
+            handle_game_over_events(event, replay_button, menu_button)
+    
+    return True
+
+def is_idle():
+    """Check if a static screen is already shown, so the loop can sleep until an event"""
+    return (replayer is None and current_state in IDLE_STATES and drawn_state == current_state
+            and not profiler.overlay_visible)
+
+def read_input(idle=False):
+    """Get the ticks and events of the next frame, from the player or a replay"""
+    global waited_events
+    if replayer is None:
+        # Input that arrived while waiting for this frame was stamped already
+        events = waited_events
+        waited_events = []
+        if idle:
+            # Sleep until something happens
+            event = pygame.event.wait(IDLE_TIMEOUT_MS)
+            if event.type != pygame.NOEVENT:
+                reaction.stamp_events([event], reaction.WAIT_RESOLUTION_MS)
+                events.append(event)
+        
+        queued = pygame.event.get()
+        reaction.stamp_events(queued)
+        events += queued
+        return clock_ticks(), events
+    
+    # Only closing the window is taken from the player during a replay
+    events = pygame.event.get(pygame.QUIT)
+    pygame.event.clear()
+    
+    frame = replayer.next_frame()
+    if frame is None:
+        return replayer.ticks, [pygame.event.Event(pygame.QUIT)]
+    
+    if not FAST_REPLAY:
+        replayer.wait_for_frame()
+    ticks, replay_events = frame
+    return ticks, events + replay_events
+
+def wait_for_frame():
+    """Wait for the next frame at the render rate, taking input the moment it arrives to stamp it precisely"""
+    # In low-latency mode input ends the wait, its feedback is drawn at once instead of a frame later
+    while clock.time_left() > 0:
+        if BUSY_WAIT:
+            events = pygame.event.get()
+            reaction.stamp_events(events)
+        elif clock.time_left() >= 1:
+            event = pygame.event.wait(int(clock.time_left()))
+            events = [] if event.type == pygame.NOEVENT else [event]
+            reaction.stamp_events(events, reaction.WAIT_RESOLUTION_MS)
+        else:
+            break
+        waited_events.extend(events)
+        
+        if LOW_LATENCY and any(event.type in INPUT_EVENTS for event in events):
+            clock.tick(wait=False)
             return
+    clock.tick()
+
+def update(ticks):
+    """Run the game logic steps due at ticks and end the game when time is up"""
+    for _ in range(clock.advance(ticks)):
+        update_game(STEP_MS)
+    update_timer()
+
+def update_game(dt):
+    """Advance the current game by one fixed step of dt milliseconds"""
+    if current_state == STATE_TWO_CHOICE:
+        load_game(STATE_TWO_CHOICE).update_two_choice(dt)
+    elif current_state == STATE_SHAPE_GRID:
+        load_game(STATE_SHAPE_GRID).update_shape_grid(dt)
+    elif current_state == STATE_MEMORY_GRID:
+        load_game(STATE_MEMORY_GRID).update_memory_grid(dt)
+
+def update_timer():
+    """Update the game timer and end the game when time is up"""
+    global current_state, game_over_tip
+    
+    if timer and current_state in [STATE_TWO_CHOICE, STATE_SHAPE_GRID, STATE_MEMORY_GRID]:
+        timer.update()
+        
+        # Check if time is up
+        if timer.is_expired():
+            # Update high score and finish the recorded session
+            update_highscore(selected_game, game_data.get("score", 0))
+            if history:
+                history.end_session(game_data.get("score", 0))
+            
+            # Switch to game over state with a tip picked once for this screen
+            game_over_tip = random.choice(GAME_OVER_TIPS)
+            current_state = STATE_GAME_OVER
+
+def draw_frame():
+    """Draw the top bar and the current state to the screen"""
+    global drawn_state
+    
+    # Draw everything
+    screen.fill(WHITE)
+    profiler.state = current_state
+    
+    # A new screen replaces the whole window
+    if current_state != drawn_state:
+        drawn_state = current_state
+        dirty_rects.mark_full()
+    
+    # Draw top bar if in a game
+    if current_state in TOP_BAR_STATES:
+        profiler.start("draw_top_bar")
+        draw_top_bar()
+        profiler.stop("draw_top_bar")
+    
+    # Draw state-specific content
+    phase = "draw_" + DRAW_PHASES[current_state]
+    profiler.start(phase)
+    
+    if current_state == STATE_MENU:
+        draw_menu(screen, font_medium, font_small, highscores)
+        
+    elif current_state == STATE_RULES:
+        draw_rules_modal(screen, font_medium, font_small, selected_game)
+        
+    elif current_state == STATE_TWO_CHOICE:
+        load_game(STATE_TWO_CHOICE).draw_two_choice(screen, font_medium, game_data)
+        
+    elif current_state == STATE_SHAPE_GRID:
+        load_game(STATE_SHAPE_GRID).draw_shape_grid(screen, font_medium, game_data)
+        
+    elif current_state == STATE_MEMORY_GRID:
+        load_game(STATE_MEMORY_GRID).draw_memory_grid(screen, font_medium, game_data)
+        
+    elif current_state == STATE_GAME_OVER:
+        draw_game_over()
+    
+    profiler.stop(phase)
+    
+    # Draw frame timings over the top bar
+    overlay_rect = profiler.draw_overlay(screen, font_small)
+    if overlay_rect:
+        dirty_rects.mark_dirty(overlay_rect)
 
 def main():
     """Main game loop"""
-    global screen, clock, font_small, font_medium, font_large, current_state, selected_game, game_data, timer, SCREEN_WIDTH, SCREEN_HEIGHT
+    global screen, clock, font_small, font_medium, font_large, game_data, drawn_state
+    global recorder, replayer, loader, SCREEN_WIDTH, SCREEN_HEIGHT
+    
+    # Seed the games, a replay starts from the seed and window of its recording
+    if REPLAY_PATH:
+        replayer = InputReplayer(REPLAY_PATH)
+        seed = replayer.seed
+        SCREEN_WIDTH, SCREEN_HEIGHT = replayer.size
+        
+        # Replayed answers are timed by frame ticks, which come out the same on every replay
+        reaction.precise = False
+    else:
+        seed = random.getrandbits(64)
+    session_seeds.seed(seed)
+    random.seed(seed)
+    if RECORD_PATH:
+        recorder = InputRecorder(seed, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    
+    # Start only what the menu needs, the rest is loaded after the first frame
+    assets.load_image(ICON_PATH)
+    pygame.display.init()
+    pygame.font.init()
+    startup.mark("display and font init")
     
     # Set up the display
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+    screen = set_display_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("MindGym")
-    pygame_icon = pygame.image.load('assets/icon.ico')
-    pygame.display.set_icon(pygame_icon)
+    pygame.display.set_icon(assets.get(ICON_PATH))
     
-    # Set up the clock
-    clock = pygame.time.Clock()
+    # Set up the clock, the game logic runs in fixed steps whatever the render rate
+    clock = GameClock(FPS)
     
     # Set up fonts
     font_small = pygame.font.Font(None, 24)
@@ -306,123 +679,108 @@ def main():
     
     # Load high scores
     load_highscores()
+    startup.mark("window, fonts and high scores")
     
     # Initialize game data
     game_data = {}
     
+    # Set up display updates
+    dirty_rects.enabled = DIRTY_RECTS
+    drawn_state = None
+    
     # Main game loop
     running = True
     while running:
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-                
-            elif event.type == pygame.VIDEORESIZE:
-                # Handle window resize
-                SCREEN_WIDTH, SCREEN_HEIGHT = event.w, event.h
-                screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
-                
-            else:
-                # Handle top bar events
-                handle_top_bar_events(event)
-                
-                # Handle state-specific events
-                if current_state == STATE_MENU:
-                    new_state = handle_menu_events(event, highscores)
-                    if new_state and new_state != current_state:
-                        selected_game = new_state
-                        current_state = STATE_RULES
-                        
-                elif current_state == STATE_RULES:
-                    new_state = handle_rules_modal_events(event)
-                    if new_state and new_state != current_state:
-                        if new_state == "start":
-                            # Start the selected game
-                            timer = Timer(30)  # 30 seconds timer
-                            game_data = {"score": 0}
-                            
-                            if selected_game == STATE_TWO_CHOICE:
-                                init_two_choice()
-                            elif selected_game == STATE_SHAPE_GRID:
-                                init_shape_grid()
-                            elif selected_game == STATE_MEMORY_GRID:
-                                init_memory_grid()
-                                
-                            current_state = selected_game
-                        else:
-                            # Go back to menu
-                            current_state = STATE_MENU
-                            
-                elif current_state == STATE_TWO_CHOICE:
-                    handle_two_choice_events(event, game_data)
-                    
-                elif current_state == STATE_SHAPE_GRID:
-                    handle_shape_grid_events(event, game_data)
-                    
-                elif current_state == STATE_MEMORY_GRID:
-                    handle_memory_grid_events(event, game_data)
-                    
-                elif current_state == STATE_GAME_OVER:
-                    replay_button, menu_button = draw_game_over()
-                    handle_game_over_events(event, replay_button, menu_button)
+        # Static screens are only drawn again when an event arrives
+        idle = is_idle()
+        ticks, events = read_input(idle)
+        if idle and not events:
+            continue
         
-        # Handle custom events for game timers
-        for event in pygame.event.get(pygame.USEREVENT + 1):
-            if current_state == STATE_TWO_CHOICE:
-                handle_two_choice_new_items()
-                
-        for event in pygame.event.get(pygame.USEREVENT + 2):
-            if current_state == STATE_SHAPE_GRID:
-                handle_shape_grid_new_grid()
+        profiler.begin_frame(current_state)
         
-        # Update timer
-        if timer and current_state in [STATE_TWO_CHOICE, STATE_SHAPE_GRID, STATE_MEMORY_GRID]:
-            timer.update()
-            
-            # Check if time is up
-            if timer.is_expired():
-                # Update high score
-                update_highscore(selected_game, game_data.get("score", 0))
-                
-                # Switch to game over state
-                current_state = STATE_GAME_OVER
-        
-        # Draw everything
-        screen.fill(WHITE)
+        # Handle events
+        profiler.start("events")
+        set_frame_ticks(ticks)
+        for event in events:
+            if not handle_event(event):
+                running = False
+        if recorder:
+            recorder.record_frame(ticks, events)
+        profiler.stop("events")
         
-        # Draw top bar if in a game
-        if current_state in [STATE_TWO_CHOICE, STATE_SHAPE_GRID, STATE_MEMORY_GRID, STATE_GAME_OVER]:
-            draw_top_bar()
+        # Advance the game logic and the game timer
+        profiler.start("update")
+        update(ticks)
+        profiler.stop("update")
         
-        # Draw state-specific content
-        if current_state == STATE_MENU:
-            draw_menu(screen, font_medium, font_small, highscores)
-            
-        elif current_state == STATE_RULES:
-            draw_rules_modal(screen, font_medium, font_small, selected_game)
-            
-        elif current_state == STATE_TWO_CHOICE:
-            draw_two_choice(screen, font_medium, game_data)
+        # Draw everything and update the display, a fast replay only runs the game
+        if not (replayer and FAST_REPLAY):
+            draw_frame()
             
-        elif current_state == STATE_SHAPE_GRID:
-            draw_shape_grid(screen, font_medium, game_data)
+            profiler.start("flip")
+            dirty_rects.present()
+            profiler.stop("flip")
             
-        elif current_state == STATE_MEMORY_GRID:
-            draw_memory_grid(screen, font_medium, game_data)
+            # A stimulus drawn in this frame is on screen from now on
+            reaction.frame_presented()
             
-        elif current_state == STATE_GAME_OVER:
-            draw_game_over()
+            # Time from each input to the flip that showed its feedback
+            if profiler.enabled:
+                flipped_at = precise_ticks()
+                for event in events:
+                    if event.type in INPUT_EVENTS and hasattr(event, "stamp"):
+                        profiler.record("input_to_flip", flipped_at - event.stamp)
+        profiler.end_frame()
         
-        # Update the display
-        pygame.display.flip()
+        # Load the rest once the first frame is on screen
+        if loader is None:
+            startup.mark("first frame")
+            loader = threading.Thread(target=load_in_background, name="startup-loader", daemon=True)
+            loader.start()
         
-        # Cap the frame rate
-        clock.tick(FPS)
+        # Cap the frame rate, a replay keeps the recorded pace instead
+        if not replayer:
+            wait_for_frame()
+    
+    # Wait for the background loading, it may still be opening the history
+    finish_loading()
+    assets.shutdown()
+    
+    # Report where the startup and the frame time went
+    if STARTUP_PROFILE:
+        startup.report()
+        print()
+        assets.report()
+    if profiler.enabled:
+        profiler.write_summary(PROFILE_PATH, {
+            "sprite_cache": load_game(STATE_SHAPE_GRID).get_sprite_cache_stats(),
+            "text_cache": get_text_cache_stats(),
+            "reaction_timing_error_ms": reaction.jitter()
+        })
+        jitter = reaction.jitter()
+        print(f"reaction time error measured over {jitter['count']} polled answers: p50 {jitter['p50']:.3f}  "
+              f"p95 {jitter['p95']:.3f}  max {jitter['max']:.3f} ms")
+        print(f"{jitter['bounded']} answers caught by a blocking wait, their error is an assumed "
+              f"{jitter['bound_ms']:.1f} ms bound, not measured")
+    
+    # Save the recorded input
+    if recorder:
+        recorder.save(RECORD_PATH)
+    
+    # Write any high score, statistics and history still queued
+    if highscore_store:
+        highscore_store.close()
+    if stats_store:
+        stats_store.close()
+    if history:
+        history.close()
     
     # Quit pygame
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
+    # The games import play_sound from main, let them share this module instead of loading a second copy
+    sys.modules["main"] = sys.modules[__name__]
     main()
\ No newline at end of file
@@ -1,4 +1,10 @@
 import pygame
+from utils.text_cache import render_text
+from utils.layer_cache import get_layer
+from utils.layout import menu_layout, window_size
+
+# Games in the order they are listed
+GAMES = ("two_choice", "shape_grid", "memory_grid")
 
 # Game descriptions
 GAME_DESCRIPTIONS = {
@@ -12,81 +18,73 @@ def draw_menu(screen, font_medium, font_small, highscores):
     # Get screen dimensions
     screen_width, screen_height = screen.get_size()
     
+    # Blit the menu composed for this window size and these high scores
+    scores = tuple(highscores.get(game, 0) for game in GAMES)
+    layer = get_layer(
+        "menu",
+        (scores, screen_width, screen_height, font_medium, font_small),
+        lambda: compose_menu(screen_width, screen_height, font_medium, font_small, highscores)
+    )
+    screen.blit(layer, (0, 0))
+    
+    # Menu item rects for click detection
+    return menu_layout(screen_width, screen_height, GAMES)
+
+def compose_menu(screen_width, screen_height, font_medium, font_small, highscores):
+    """Compose the title, game boxes and instructions of the menu onto one surface"""
+    layer = pygame.Surface((screen_width, screen_height))
+    layer.fill((255, 255, 255))
+    
     # Draw title
-    title_text = font_medium.render("Memory & Focus Mini-Games", True, (0, 0, 0))
+    title_text = render_text(font_medium, "Memory & Focus Mini-Games", (0, 0, 0))
     title_rect = title_text.get_rect(center=(screen_width // 2, 100))
-    screen.blit(title_text, title_rect)
+    layer.blit(title_text, title_rect)
     
     # Draw game options
-    games = ["two_choice", "shape_grid", "memory_grid"]
     game_names = {
         "two_choice": "Pick the Bigger",
         "shape_grid": "Find the Shape",
         "memory_grid": "Memory Recall"
     }
     
-    menu_items = []
-    for i, game in enumerate(games):
-        # Calculate position
-        y_pos = 200 + i * 120
-        
+    for game, box in menu_layout(screen_width, screen_height, GAMES):
         # Draw game box
-        box_width, box_height = 600, 100
-        box_x = (screen_width - box_width) // 2
+        box_x, y_pos, box_width, box_height = box
         
-        pygame.draw.rect(screen, (240, 240, 240), (box_x, y_pos, box_width, box_height))
-        pygame.draw.rect(screen, (0, 0, 0), (box_x, y_pos, box_width, box_height), 2)
+        pygame.draw.rect(layer, (240, 240, 240), box)
+        pygame.draw.rect(layer, (0, 0, 0), box, 2)
         
         # Draw game name
-        name_text = font_medium.render(game_names[game], True, (0, 0, 0))
-        screen.blit(name_text, (box_x + 20, y_pos + 20))
+        name_text = render_text(font_medium, game_names[game], (0, 0, 0))
+        layer.blit(name_text, (box_x + 20, y_pos + 20))
         
         # Draw game description
-        desc_text = font_small.render(GAME_DESCRIPTIONS[game], True, (100, 100, 100))
-        screen.blit(desc_text, (box_x + 20, y_pos + 60))
+        desc_text = render_text(font_small, GAME_DESCRIPTIONS[game], (100, 100, 100))
+        layer.blit(desc_text, (box_x + 20, y_pos + 60))
         
         # Draw high score badge
         highscore = highscores.get(game, 0)
-        badge_text = font_small.render(f"Best: {highscore}", True, (255, 255, 255))
+        badge_text = render_text(font_small, f"Best: {highscore}", (255, 255, 255))
         badge_width = badge_text.get_width() + 20
         badge_height = 30
         
-        pygame.draw.rect(screen, (0, 100, 200), (box_x + box_width - badge_width - 20, y_pos + 35, badge_width, badge_height))
-        screen.blit(badge_text, (box_x + box_width - badge_width - 10, y_pos + 40))
-        
-        # Store menu item rect for click detection
-        menu_items.append((game, pygame.Rect(box_x, y_pos, box_width, box_height)))
+        pygame.draw.rect(layer, (0, 100, 200), (box_x + box_width - badge_width - 20, y_pos + 35, badge_width, badge_height))
+        layer.blit(badge_text, (box_x + box_width - badge_width - 10, y_pos + 40))
     
     # Draw instructions
-    inst_text = font_small.render("Use UP/DOWN arrows to navigate and ENTER to select, or click with mouse", True, (100, 100, 100))
+    inst_text = render_text(font_small, "Use UP/DOWN arrows to navigate and ENTER to select, or click with mouse", (100, 100, 100))
     inst_rect = inst_text.get_rect(center=(screen_width // 2, screen_height - 50))
-    screen.blit(inst_text, inst_rect)
+    layer.blit(inst_text, inst_rect)
     
-    return menu_items
+    return layer
 
 def handle_menu_events(event, highscores):
     """Handle events for the menu screen"""
-    # Get menu items
-    menu_items = []
-    games = ["two_choice", "shape_grid", "memory_grid"]
-    game_names = {
-        "two_choice": "Pick the Bigger",
-        "shape_grid": "Find the Shape",
-        "memory_grid": "Memory Recall"
-    }
-    
-    screen_width = 800  # Default width
-    for i, game in enumerate(games):
-        y_pos = 200 + i * 120
-        box_width, box_height = 600, 100
-        box_x = (screen_width - box_width) // 2
-        menu_items.append((game, pygame.Rect(box_x, y_pos, box_width, box_height)))
-    
-    # Handle mouse click
+    # Handle mouse click on the boxes of the current window size
     if event.type == pygame.MOUSEBUTTONDOWN:
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = event.pos
         
-        for game, rect in menu_items:
+        for game, rect in menu_layout(*window_size(), GAMES):
             if rect.collidepoint(mouse_pos):
                 return game
     
@@ -100,6 +98,6 @@ def handle_menu_events(event, highscores):
             pass
         elif event.key == pygame.K_RETURN:
             # Select first game by default
-            return games[0]
+            return GAMES[0]
     
     return None
\ No newline at end of file
@@ -1,4 +1,8 @@
 import pygame
+from utils.text_cache import render_text
+from utils.layer_cache import get_layer
+from utils.overlay_pool import get_overlay
+from utils.layout import rules_modal_layout, window_size
 
 # Game rules
 GAME_RULES = {
@@ -28,24 +32,33 @@ def draw_rules_modal(screen, font_medium, font_small, game):
     # Get screen dimensions
     screen_width, screen_height = screen.get_size()
     
-    # Draw semi-transparent overlay
-    overlay = pygame.Surface((screen_width, screen_height))
-    overlay.set_alpha(200)
-    overlay.fill((0, 0, 0))
-    screen.blit(overlay, (0, 0))
+    # Blit the modal composed for this game and window size
+    layer = get_layer(
+        "rules_modal",
+        (game, screen_width, screen_height, font_medium, font_small),
+        lambda: compose_rules_modal(screen_width, screen_height, font_medium, font_small, game)
+    )
+    screen.blit(layer, (0, 0))
+    
+    layout = rules_modal_layout(screen_width, screen_height)
+    return layout["start"], layout["back"]
+
+def compose_rules_modal(screen_width, screen_height, font_medium, font_small, game):
+    """Compose the overlay, box, rules and buttons of the modal onto one surface"""
+    # Start from a copy of the semi-transparent overlay
+    layer = get_overlay((screen_width, screen_height), (0, 0, 0, 200)).copy()
     
     # Draw modal box
-    box_width, box_height = 600, 400
-    box_x = (screen_width - box_width) // 2
-    box_y = (screen_height - box_height) // 2
+    layout = rules_modal_layout(screen_width, screen_height)
+    box_x, box_y = layout["box"].topleft
     
-    pygame.draw.rect(screen, (255, 255, 255), (box_x, box_y, box_width, box_height))
-    pygame.draw.rect(screen, (0, 0, 0), (box_x, box_y, box_width, box_height), 2)
+    pygame.draw.rect(layer, (255, 255, 255), layout["box"])
+    pygame.draw.rect(layer, (0, 0, 0), layout["box"], 2)
     
     # Draw title
-    title_text = font_medium.render("Read the rules", True, (0, 0, 0))
+    title_text = render_text(font_medium, "Read the rules", (0, 0, 0))
     title_rect = title_text.get_rect(center=(screen_width // 2, box_y + 40))
-    screen.blit(title_text, title_rect)
+    layer.blit(title_text, title_rect)
     
     # Draw game name
     game_names = {
@@ -54,55 +67,46 @@ def draw_rules_modal(screen, font_medium, font_small, game):
         "memory_grid": "Memory Recall"
     }
     
-    game_name_text = font_medium.render(game_names[game], True, (0, 0, 200))
+    game_name_text = render_text(font_medium, game_names[game], (0, 0, 200))
     game_name_rect = game_name_text.get_rect(center=(screen_width // 2, box_y + 80))
-    screen.blit(game_name_text, game_name_rect)
+    layer.blit(game_name_text, game_name_rect)
     
     # Draw rules
     rules = GAME_RULES[game]
     for i, rule in enumerate(rules):
-        rule_text = font_small.render(f"• {rule}", True, (0, 0, 0))
-        screen.blit(rule_text, (box_x + 50, box_y + 130 + i * 40))
+        rule_text = render_text(font_small, f"• {rule}", (0, 0, 0))
+        layer.blit(rule_text, (box_x + 50, box_y + 130 + i * 40))
     
     # Draw buttons
-    start_button = pygame.Rect(box_x + 100, box_y + box_height - 70, 150, 50)
-    back_button = pygame.Rect(box_x + box_width - 250, box_y + box_height - 70, 150, 50)
+    start_button, back_button = layout["start"], layout["back"]
     
-    pygame.draw.rect(screen, (0, 200, 0), start_button)
-    pygame.draw.rect(screen, (200, 0, 0), back_button)
+    pygame.draw.rect(layer, (0, 200, 0), start_button)
+    pygame.draw.rect(layer, (200, 0, 0), back_button)
     
-    pygame.draw.rect(screen, (0, 0, 0), start_button, 2)
-    pygame.draw.rect(screen, (0, 0, 0), back_button, 2)
+    pygame.draw.rect(layer, (0, 0, 0), start_button, 2)
+    pygame.draw.rect(layer, (0, 0, 0), back_button, 2)
     
-    start_text = font_medium.render("Start", True, (255, 255, 255))
-    back_text = font_medium.render("Back", True, (255, 255, 255))
+    start_text = render_text(font_medium, "Start", (255, 255, 255))
+    back_text = render_text(font_medium, "Back", (255, 255, 255))
     
     start_text_rect = start_text.get_rect(center=start_button.center)
     back_text_rect = back_text.get_rect(center=back_button.center)
     
-    screen.blit(start_text, start_text_rect)
-    screen.blit(back_text, back_text_rect)
+    layer.blit(start_text, start_text_rect)
+    layer.blit(back_text, back_text_rect)
     
-    return start_button, back_button
+    return layer
 
 def handle_rules_modal_events(event):
     """Handle events for the rules modal"""
-    # Draw buttons to get their positions
-    screen_width, screen_height = 800, 600  # Default size
-    box_width, box_height = 600, 400
-    box_x = (screen_width - box_width) // 2
-    box_y = (screen_height - box_height) // 2
-    
-    start_button = pygame.Rect(box_x + 100, box_y + box_height - 70, 150, 50)
-    back_button = pygame.Rect(box_x + box_width - 250, box_y + box_height - 70, 150, 50)
-    
     # Handle mouse click
     if event.type == pygame.MOUSEBUTTONDOWN:
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = event.pos
+        layout = rules_modal_layout(*window_size())
         
-        if start_button.collidepoint(mouse_pos):
+        if layout["start"].collidepoint(mouse_pos):
             return "start"
-        elif back_button.collidepoint(mouse_pos):
+        elif layout["back"].collidepoint(mouse_pos):
             return "back"
     
     # Handle keyboard
@@ -0,0 +1,189 @@
+"""Serve game sessions to thin clients over localhost TCP
+
+One asyncio event loop hosts every session. Messages are JSON, one per
+line. A client starts a session, sends actions and gets back only the
+fields of the game state that changed. As in the game, actions are
+refused while an answer's feedback or the memory pattern is shown.
+Sessions of the same player adapt to one difficulty model per game:
+
+    -> {"type": "start", "game": "shape_grid", "seed": 42, "player": "ana"}
+    <- {"type": "state", "game": "shape_grid", "time_left_ms": 30000, "score": 0, "round": 1, ...}
+    -> {"type": "action", "action": [1, 2]}
+    <- {"type": "diff", "changes": {"score": 15, "round": 2, "cells": [...]}, "result": {...}}
+    <- {"type": "over", "score": 15}
+
+    python -m server.game_server --port 8765
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from engine.host import SESSIONS, SESSION_MS, ROUND_BATCH_SIZE, parse_action
+from engine.difficulty import DifficultyModel
+from engine import two_choice, shape_grid, memory_grid
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+# Per-session memory is bounded by these limits and a small round pool
+MAX_SESSIONS = 1000
+MAX_MESSAGE_BYTES = 1024  # longest line read from a client
+WRITE_BUFFER_BYTES = 16 * 1024  # unsent bytes before the session waits for the client
+START_TIMEOUT_S = 10  # how long a new connection may hold a slot without starting a session
+lockouts = True  # refuse actions while the game would, the load test turns this off
+
+# Difficulty models by (player, game), a few dozen bytes each
+MAX_PLAYERS = 100000
+LEVEL_COUNTS = {
+    "two_choice": len(two_choice.LEVELS),
+    "shape_grid": len(shape_grid.LEVELS),
+    "memory_grid": len(memory_grid.LEVELS)
+}
+# Levels the models start from, Memory Recall starts where its sessions do as in the game
+START_LEVELS = {
+    "two_choice": 0,
+    "shape_grid": 0,
+    "memory_grid": memory_grid.LEVELS.index(memory_grid.DIFFICULTY_CELLS["hard"])
+}
+player_models = {}
+
+open_sessions = 0
+served_sessions = 0
+
+def get_model(player, game):
+    """Get the difficulty model of a player, None for anonymous players or when no more fit"""
+    if not isinstance(player, str) or len(player) > 64:
+        return None
+    model = player_models.get((player, game))
+    if model is None and len(player_models) < MAX_PLAYERS:
+        model = player_models[(player, game)] = DifficultyModel(LEVEL_COUNTS[game], START_LEVELS[game])
+    return model
+
+def snapshot(game, session):
+    """Get the state a client needs to draw a session"""
+    state = {"score": session.score, "round": session.round, "level": session.level}
+    if game == "two_choice":
+        state["values"] = list(session.values)
+    elif game == "shape_grid":
+        state["cells"] = [list(cell) for cell in session.cells]
+        state["target"] = session.target_text()
+    elif game == "memory_grid":
+        state["highlighted"] = session.highlighted
+        state["selected"] = session.selected
+    return state
+
+def diff(old, new):
+    """Get the fields of new that differ from old"""
+    return {key: value for key, value in new.items() if old.get(key) != value}
+
+def lockout_end(loop, lockout_ms):
+    """Get the loop time the session takes actions again after locking input for lockout_ms"""
+    return loop.time() + lockout_ms / 1000 if lockouts else 0
+
+async def send(writer, message):
+    """Send a message, waiting while the client is slow to read"""
+    writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+    await writer.drain()
+
+async def play(reader, writer):
+    """Run one session from its start message until its time is up"""
+    loop = asyncio.get_running_loop()
+
+    try:
+        line = await asyncio.wait_for(reader.readline(), START_TIMEOUT_S)
+    except TimeoutError:
+        await send(writer, {"type": "error", "error": "no start message"})
+        return
+    start = json.loads(line or b"null")
+    if not isinstance(start, dict) or start.get("type") != "start" or start.get("game") not in SESSIONS:
+        await send(writer, {"type": "error", "error": "expected a start message with a known game"})
+        return
+    game = start["game"]
+    seed = start.get("seed")
+    if not isinstance(seed, int):
+        seed = random.getrandbits(64)
+
+    session = SESSIONS[game](seed=seed, batch_size=ROUND_BATCH_SIZE, model=get_model(start.get("player"), game))
+    state = snapshot(game, session)
+    ends_at = loop.time() + SESSION_MS / 1000
+    answerable_at = lockout_end(loop, session.FIRST_LOCKOUT_MS)
+    await send(writer, {"type": "state", "game": game, "time_left_ms": SESSION_MS, **state})
+
+    while True:
+        time_left = ends_at - loop.time()
+        if time_left <= 0:
+            break
+        try:
+            line = await asyncio.wait_for(reader.readline(), time_left)
+        except TimeoutError:
+            break
+        if not line:
+            return  # The client left
+
+        message = json.loads(line)
+        action = parse_action(game, message.get("action")) if isinstance(message, dict) else None
+        if action is None:
+            await send(writer, {"type": "error", "error": "invalid action"})
+            continue
+        if loop.time() < answerable_at:
+            await send(writer, {"type": "error", "error": "input is locked"})
+            continue
+
+        # Only what the action changed goes back to the client
+        result = session.step(action)
+        new_state = snapshot(game, session)
+        reply = {"type": "diff", "changes": diff(state, new_state)}
+        state = new_state
+        if result is not None:
+            reply["result"] = result
+            answerable_at = lockout_end(loop, session.LOCKOUT_MS)
+        await send(writer, reply)
+
+    await send(writer, {"type": "over", "score": session.score})
+
+async def handle_client(reader, writer):
+    """Serve a client connection, refusing it once the server is full"""
+    global open_sessions, served_sessions
+    writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_BYTES)
+
+    if open_sessions >= MAX_SESSIONS:
+        try:
+            await send(writer, {"type": "error", "error": "server full"})
+        except ConnectionError:
+            pass
+        writer.close()
+        return
+
+    open_sessions += 1
+    try:
+        await play(reader, writer)
+        served_sessions += 1
+    except (ConnectionError, ValueError):
+        # A dropped connection, a line over the limit or a message that isn't JSON ends the session
+        pass
+    finally:
+        open_sessions -= 1
+        writer.close()
+
+async def serve(host=HOST, port=PORT):
+    """Accept clients until cancelled"""
+    server = await asyncio.start_server(handle_client, host, port, limit=MAX_MESSAGE_BYTES)
+    print(f"MindGym server on {host}:{port}, up to {MAX_SESSIONS} sessions")
+    async with server:
+        await server.serve_forever()
+
+def main_server():
+    """Run the server on the address given on the command line"""
+    parser = argparse.ArgumentParser(description="Serve MindGym sessions to thin clients")
+    parser.add_argument("--host", default=HOST, help="address to listen on, localhost by default")
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"{served_sessions} sessions served")
+
+if __name__ == "__main__":
+    main_server()
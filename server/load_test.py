@@ -0,0 +1,101 @@
+"""Load the game server with many scripted clients on localhost
+
+    python -m server.load_test --clients 500 --actions 50
+
+Starts a server on its own event loop unless --port points at a running
+one, then reports the answers per second and the round-trip latency. The
+server started here locks no input, against a running server the clients
+wait out the feedback and the memory pattern like a player.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from utils.profiler import percentiles
+from server import game_server
+from server.game_server import HOST, MAX_MESSAGE_BYTES, handle_client
+from engine.shape_grid import GRID_ROWS as SHAPE_ROWS, GRID_COLS as SHAPE_COLS
+from engine.host import SESSIONS
+from engine.memory_grid import SUBMIT, GRID_ROWS as MEMORY_ROWS, GRID_COLS as MEMORY_COLS
+
+GAMES = ["two_choice", "shape_grid", "memory_grid"]
+
+def random_action(game, rng):
+    """Get a random action for a game"""
+    if game == "two_choice":
+        return rng.randrange(2)
+    if game == "shape_grid":
+        return [rng.randrange(SHAPE_ROWS), rng.randrange(SHAPE_COLS)]
+    if rng.random() < 0.2:
+        return SUBMIT
+    return [rng.randrange(MEMORY_ROWS), rng.randrange(MEMORY_COLS)]
+
+async def run_client(host, port, game, seed, actions, latencies, lockouts):
+    """Play a session with random actions, recording the round trip of each"""
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random(seed)
+    writer.write(json.dumps({"type": "start", "game": game, "seed": seed, "player": f"player{seed % 1000}"}).encode() + b"\n")
+    state = json.loads(await reader.readline())
+
+    # The server takes no actions while the game locks input
+    session_class = SESSIONS[game]
+    wait_ms = session_class.FIRST_LOCKOUT_MS if lockouts else 0
+    for _ in range(actions):
+        if wait_ms:
+            await asyncio.sleep(wait_ms / 1000)
+            wait_ms = 0
+        start = time.perf_counter()
+        writer.write(json.dumps({"action": random_action(game, rng)}).encode() + b"\n")
+        reply = json.loads(await reader.readline())
+        latencies.append((time.perf_counter() - start) * 1000)
+        if reply["type"] == "over":
+            break
+        state.update(reply.get("changes", {}))
+        if lockouts and "result" in reply:
+            wait_ms = session_class.LOCKOUT_MS
+
+    writer.close()
+    await writer.wait_closed()
+    return state["score"]
+
+async def run_load(clients, actions, port, seed):
+    """Run the clients at once against a server and report the throughput"""
+    server = None
+    lockouts = True
+    if port is None:
+        # The server started here locks no input, so the clients never wait and only its speed counts
+        game_server.lockouts = lockouts = False
+        server = await asyncio.start_server(handle_client, HOST, 0, limit=MAX_MESSAGE_BYTES)
+        port = server.sockets[0].getsockname()[1]
+
+    rng = random.Random(seed)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(HOST, port, GAMES[i % len(GAMES)], rng.getrandbits(64), actions, latencies, lockouts)
+        for i in range(clients)
+    ))
+    wall = time.perf_counter() - start
+
+    if server:
+        server.close()
+        await server.wait_closed()
+
+    stats = percentiles(latencies)
+    print(f"{clients} clients, {len(latencies)} answers in {wall:.2f} s, {len(latencies) / wall:.0f} answers/s")
+    print(f"round trip p50 {stats['p50']:.2f}  p95 {stats['p95']:.2f}  p99 {stats['p99']:.2f}  max {stats['max']:.2f} ms")
+
+def main_load_test():
+    """Run the load test given on the command line"""
+    parser = argparse.ArgumentParser(description="Load the MindGym server with scripted clients")
+    parser.add_argument("--clients", type=int, default=300, help="concurrent sessions")
+    parser.add_argument("--actions", type=int, default=50, help="actions sent by each client")
+    parser.add_argument("--port", type=int, help="port of a running server, one is started by default")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run_load(args.clients, args.actions, args.port, args.seed))
+
+if __name__ == "__main__":
+    main_load_test()
@@ -0,0 +1,180 @@
+"""A thin pygame client that draws the state sent by the game server
+
+    python -m server.game_server
+    python -m server.thin_client --game memory_grid
+"""
+import argparse
+import json
+import socket
+
+import pygame
+from utils.layout import two_choice_layout, shape_grid_layout, memory_grid_layout
+from utils.text_cache import render_text
+from utils.timer import clock_ticks
+from games.shape_grid import draw_shape
+from engine.memory_grid import SUBMIT, HIGHLIGHT_MS, cell_bit
+from server.game_server import HOST, PORT
+
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+FPS = 60
+
+class Connection:
+    """A connection to the server that sends and receives JSON lines without blocking a frame"""
+
+    def __init__(self, host, port):
+        """Connect to the server"""
+        self.sock = socket.create_connection((host, port))
+        self.sock.setblocking(False)
+        self.buffer = b""
+        self.closed = False
+
+    def send(self, message):
+        """Send a message to the server"""
+        self.sock.sendall(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+    def receive(self):
+        """Get the messages that arrived since the last call"""
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            if not data:
+                self.closed = True
+                break
+            self.buffer += data
+
+        *lines, self.buffer = self.buffer.split(b"\n")
+        return [json.loads(line) for line in lines if line]
+
+    def close(self):
+        """Close the connection"""
+        self.sock.close()
+
+def draw(screen, fonts, state, now, highlight_until):
+    """Draw the last state received from the server"""
+    font_small, font_medium = fonts
+    width, height = screen.get_size()
+    screen.fill((255, 255, 255))
+    game = state.get("game")
+
+    # Score and time left
+    time_left = max(0, state.get("ends_at", now) - now) // 1000
+    screen.blit(render_text(font_small, f"Score: {state.get('score', 0)}  Level: {state.get('level', 0) + 1}", (0, 0, 0)), (20, 15))
+    screen.blit(render_text(font_small, f"Time: {time_left}s", (0, 0, 0)), (width - 120, 15))
+
+    if "over" in state:
+        text = render_text(font_medium, f"Game over, score {state['over']}", (0, 0, 0))
+        screen.blit(text, text.get_rect(center=(width // 2, height // 2)))
+    elif game == "two_choice":
+        for value, box in zip(state["values"], two_choice_layout(width, height)):
+            pygame.draw.rect(screen, (240, 240, 240), box)
+            pygame.draw.rect(screen, (0, 0, 0), box, 2)
+            text = render_text(font_medium, str(value), (0, 0, 0))
+            screen.blit(text, text.get_rect(center=box.center))
+    elif game == "shape_grid":
+        text = render_text(font_medium, state["target"], (0, 0, 0))
+        screen.blit(text, text.get_rect(center=(width // 2, 100)))
+        grid = shape_grid_layout(width, height)
+        for index, cell in enumerate(state["cells"]):
+            rect = grid.cells[index // grid.cols][index % grid.cols]
+            pygame.draw.rect(screen, (240, 240, 240), rect)
+            pygame.draw.rect(screen, (0, 0, 0), rect, 2)
+            draw_shape(screen, tuple(cell), rect.centerx, rect.centery, grid.cell_width * 0.6)
+    elif game == "memory_grid":
+        showing = now < highlight_until
+        mask = state["highlighted"] if showing else state["selected"]
+        color = (255, 255, 0) if showing else (0, 0, 255)
+        grid = memory_grid_layout(width, height)
+        for row in range(grid.rows):
+            for col in range(grid.cols):
+                rect = grid.cells[row][col]
+                pygame.draw.rect(screen, (240, 240, 240), rect)
+                pygame.draw.rect(screen, (0, 0, 0), rect, 2)
+                if mask & cell_bit(row, col):
+                    pygame.draw.rect(screen, color, rect.inflate(-10, -10))
+
+def get_action(event, state, now, highlight_until):
+    """Turn an input event into an action for the server, or None"""
+    game = state.get("game")
+    size = pygame.display.get_surface().get_size()
+    if "over" in state or game is None:
+        return None
+
+    if game == "two_choice":
+        if event.type == pygame.KEYDOWN and event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+            return 0 if event.key == pygame.K_LEFT else 1
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            for index, box in enumerate(two_choice_layout(*size)):
+                if box.collidepoint(event.pos):
+                    return index
+    elif game == "shape_grid":
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            cell = shape_grid_layout(*size).cell_at(event.pos)
+            return list(cell) if cell else None
+    elif game == "memory_grid" and now >= highlight_until:
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+            return SUBMIT
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            cell = memory_grid_layout(*size).cell_at(event.pos)
+            return list(cell) if cell else None
+    return None
+
+def main_client():
+    """Play a session hosted by the server"""
+    parser = argparse.ArgumentParser(description="Thin MindGym client")
+    parser.add_argument("--game", choices=["two_choice", "shape_grid", "memory_grid"], default="two_choice")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--player", help="name the server keeps your difficulty level under")
+    args = parser.parse_args()
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("MindGym (thin client)")
+    fonts = (pygame.font.Font(None, 24), pygame.font.Font(None, 36))
+    clock = pygame.time.Clock()
+
+    connection = Connection(args.host, args.port)
+    connection.send({"type": "start", "game": args.game, "seed": args.seed, "player": args.player})
+
+    state = {}
+    highlight_until = 0
+    running = True
+    while running:
+        now = clock_ticks()
+
+        # Apply what the server sent, a new round shows the memory pattern again
+        for message in connection.receive():
+            if message["type"] == "state":
+                state = message
+                state["ends_at"] = now + message["time_left_ms"]
+            elif message["type"] == "diff":
+                state.update(message["changes"])
+            elif message["type"] == "over":
+                state["over"] = message["score"]
+            if "round" in message.get("changes", message) and state.get("game") == "memory_grid":
+                highlight_until = now + HIGHLIGHT_MS
+        if connection.closed and "over" not in state:
+            state["over"] = state.get("score", 0)
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+                continue
+            action = get_action(event, state, now, highlight_until)
+            if action is not None:
+                connection.send({"type": "action", "action": action})
+
+        draw(screen, fonts, state, now, highlight_until)
+        pygame.display.flip()
+        clock.tick(FPS)
+
+    connection.close()
+    pygame.quit()
+
+if __name__ == "__main__":
+    main_client()
@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+class AssetManager:
+    """Loads images and sounds on a thread pool, each asset behind a future"""
+
+    def __init__(self, workers=2):
+        """Initialize the manager, no thread is started until the first load"""
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset-loader")
+        self.futures = {}
+        self.load_times = {}  # path -> milliseconds spent loading it
+
+    def load_image(self, path):
+        """Start loading an image and return its future"""
+        return self.load(path, pygame.image.load)
+
+    def load_sound(self, path):
+        """Start loading a sound and return its future, the mixer must be initialized"""
+        return self.load(path, pygame.mixer.Sound)
+
+    def load(self, path, loader):
+        """Start loading an asset with loader unless it is already loading"""
+        future = self.futures.get(path)
+        if future is None:
+            future = self.futures[path] = self.executor.submit(self.timed, path, loader)
+        return future
+
+    def timed(self, path, loader):
+        """Load an asset on a worker and record how long it took"""
+        start = time.perf_counter()
+        try:
+            return loader(path)
+        finally:
+            self.load_times[path] = (time.perf_counter() - start) * 1000
+
+    def get(self, path):
+        """Get a loaded asset, waiting for it if it is still loading"""
+        return self.futures[path].result()
+
+    def ready(self, path):
+        """Get an asset if it loaded, None while it is loading or if it failed"""
+        future = self.futures.get(path)
+        if future is None or not future.done() or future.exception():
+            return None
+        return future.result()
+
+    def shutdown(self):
+        """Stop the worker threads once the queued loads are done"""
+        self.executor.shutdown(wait=True)
+
+    def report(self):
+        """Print the load time of every asset"""
+        print(f"{'asset':<32} {'ms':>8}")
+        for path, milliseconds in sorted(self.load_times.items(), key=lambda item: -item[1]):
+            future = self.futures[path]
+            failed = "  failed" if future.done() and future.exception() else ""
+            print(f"{path:<32} {milliseconds:>8.1f}{failed}")
+
+def to_display_format(surface):
+    """Convert a surface to the pixel format of the display so blitting it needs no conversion"""
+    if pygame.display.get_surface() is None:
+        return surface
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
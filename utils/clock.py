@@ -0,0 +1,51 @@
+import pygame
+from utils.timer import precise_ticks
+
+# Game logic advances in fixed steps of real time, whatever the frame rate
+STEP_MS = 10
+MAX_STEPS = 25  # A longer stall is dropped instead of being caught up at once
+
+class GameClock:
+    """Splits real time into fixed logic steps and caps the render rate"""
+
+    def __init__(self, fps=60, step_ms=STEP_MS):
+        """Initialize the clock, an fps of 0 renders as fast as possible"""
+        self.fps = fps
+        self.step_ms = step_ms
+        self.accumulator = 0
+        self.last_ticks = None
+        self.render_clock = pygame.time.Clock()
+        self.frame_due = 0
+
+    def reset(self):
+        """Forget the time of the last frame, the next frame runs no steps"""
+        self.accumulator = 0
+        self.last_ticks = None
+
+    def advance(self, ticks):
+        """Add the time since the last frame and return how many logic steps are due"""
+        if self.last_ticks is None:
+            self.last_ticks = ticks
+        self.accumulator += ticks - self.last_ticks
+        self.last_ticks = ticks
+
+        steps = self.accumulator // self.step_ms
+        self.accumulator -= steps * self.step_ms
+        return min(steps, MAX_STEPS)
+
+    def tick(self, wait=True):
+        """Wait for the next frame at the render rate, or with wait False only start the next frame"""
+        if self.fps and wait:
+            self.render_clock.tick(self.fps)
+        else:
+            self.render_clock.tick()
+        if self.fps:
+            self.frame_due = precise_ticks() + 1000 / self.fps
+    
+    def time_left(self):
+        """Get the milliseconds until the next frame is due at the render rate"""
+        return max(0, self.frame_due - precise_ticks())
+
+    def get_fps(self):
+        """Get the measured render rate"""
+        return self.render_clock.get_fps()
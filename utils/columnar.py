@@ -0,0 +1,306 @@
+"""Export the session history to column files and read them memory-mapped
+
+Every column of the sessions and trials tables becomes a file of fixed-width
+values, described by manifest.json, so a reader can filter and aggregate
+months of trials without loading them:
+
+    python -m utils.columnar export --out data/export --days 30
+    python -m utils.columnar summary --out data/export
+"""
+import argparse
+import array
+import json
+import math
+import mmap
+import os
+import sqlite3
+import sys
+import time
+
+HISTORY_PATH = "data/history.sqlite3"
+EXPORT_DIR = "data/export"
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+
+# Values written per column before the buffer goes to disk
+FLUSH_ROWS = 65536
+
+# Missing values: NaN in float columns, these in the others
+INT_NULL = -2 ** 31
+CATEGORY_NULL = 0xFFFF
+
+# Fixed columns as (name, typecode), stimulus parameters follow as param_<name> columns
+SESSION_COLUMNS = [
+    ("id", "q"),
+    ("game", "H"),
+    ("started_at", "d"),
+    ("ended_at", "d"),
+    ("score", "i")
+]
+TRIAL_COLUMNS = [
+    ("time", "d"),
+    ("session", "q"),
+    ("game", "H"),
+    ("round", "i"),
+    ("correct", "b"),
+    ("points", "i"),
+    ("response_ms", "f"),
+    ("streak", "i")
+]
+
+class ColumnWriter:
+    """Appends the values of one column to its file in fixed-width binary"""
+
+    def __init__(self, path, typecode, categorical=False):
+        """Initialize a writer for a new column file, mapping strings to codes when categorical"""
+        self.path = path
+        self.typecode = typecode
+        self.categories = {} if categorical else None
+        self.null = math.nan if typecode in "fd" else CATEGORY_NULL if categorical else INT_NULL
+        self.buffer = array.array(typecode)
+        self.rows = 0
+        self.file = open(path, "wb")
+
+    def append(self, value):
+        """Append a value, None or a value of the wrong type is stored as missing"""
+        if self.categories is not None:
+            if isinstance(value, str):
+                value = self.categories.setdefault(value, len(self.categories))
+            else:
+                value = None
+        elif isinstance(value, str):
+            value = None
+
+        self.buffer.append(self.null if value is None else value)
+        self.rows += 1
+        if len(self.buffer) >= FLUSH_ROWS:
+            self.flush()
+
+    def fill(self, count):
+        """Append count missing values, for a column first seen after count rows"""
+        for _ in range(count):
+            self.append(None)
+
+    def flush(self):
+        """Write the buffered values"""
+        self.buffer.tofile(self.file)
+        del self.buffer[:]
+
+    def close(self):
+        """Write the rest and close the file"""
+        self.flush()
+        self.file.close()
+
+    def describe(self):
+        """Get the manifest entry of the column"""
+        entry = {"file": os.path.basename(self.path), "type": self.typecode, "null": self.null}
+        if math.isnan(self.null):
+            entry["null"] = "nan"
+        if self.categories is not None:
+            entry["categories"] = list(self.categories)
+        return entry
+
+class ColumnarTable:
+    """A table of an export, each column memory-mapped when first used"""
+
+    def __init__(self, directory, table="trials"):
+        """Open a table of the export in a directory"""
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_NAME), "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported export version {manifest.get('version')}")
+        if manifest["byteorder"] != sys.byteorder:
+            raise ValueError(f"export was written on a {manifest['byteorder']}-endian machine")
+
+        self.rows = manifest["tables"][table]["rows"]
+        self.columns = manifest["tables"][table]["columns"]
+        self.table_dir = os.path.join(directory, table)
+        self.maps = {}
+        self.views = {}
+
+    def column(self, name):
+        """Get the values of a column as a memoryview over its mapped file"""
+        view = self.views.get(name)
+        if view is None:
+            spec = self.columns[name]
+            if self.rows == 0:
+                view = memoryview(array.array(spec["type"]))
+            else:
+                with open(os.path.join(self.table_dir, spec["file"]), "rb") as f:
+                    self.maps[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                view = memoryview(self.maps[name]).cast(spec["type"])
+                if len(view) != self.rows:
+                    raise ValueError(f"column {name} has {len(view)} values, expected {self.rows}")
+            self.views[name] = view
+        return view
+
+    def categories(self, name):
+        """Get the strings of a categorical column, indexed by their code"""
+        return self.columns[name].get("categories", [])
+
+    def code(self, name, value):
+        """Get the code of a string in a categorical column, None if it never occurs"""
+        categories = self.categories(name)
+        return categories.index(value) if value in categories else None
+
+    def close(self):
+        """Release the columns and unmap their files"""
+        for view in self.views.values():
+            view.release()
+        for mapped in self.maps.values():
+            mapped.close()
+        self.views = {}
+        self.maps = {}
+
+def export_history(db_path=HISTORY_PATH, directory=EXPORT_DIR, since=None):
+    """Export the sessions and trials recorded since a Unix time to column files, return the manifest"""
+    connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    since = since or 0
+    try:
+        tables = {
+            "sessions": export_sessions(connection, os.path.join(directory, "sessions"), since),
+            "trials": export_trials(connection, os.path.join(directory, "trials"), since)
+        }
+    finally:
+        connection.close()
+
+    # The manifest goes last, a reader never sees a half-written export as complete
+    manifest = {"version": FORMAT_VERSION, "byteorder": sys.byteorder, "since": since, "tables": tables}
+    temp_path = os.path.join(directory, MANIFEST_NAME + ".tmp")
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temp_path, os.path.join(directory, MANIFEST_NAME))
+    return manifest
+
+def open_columns(directory, columns):
+    """Create the writers of a table's fixed columns"""
+    os.makedirs(directory, exist_ok=True)
+    return {
+        name: ColumnWriter(os.path.join(directory, name + ".bin"), typecode, categorical=name == "game")
+        for name, typecode in columns
+    }
+
+def close_columns(writers, rows):
+    """Close a table's writers and get its manifest entry"""
+    for writer in writers.values():
+        writer.close()
+    return {"rows": rows, "columns": {name: writer.describe() for name, writer in writers.items()}}
+
+def export_sessions(connection, directory, since):
+    """Write the sessions started since a Unix time, and the older ones with trials since then"""
+    writers = open_columns(directory, SESSION_COLUMNS)
+    rows = 0
+    cursor = connection.execute(
+        "SELECT id, game, started_at, ended_at, score FROM sessions"
+        " WHERE started_at >= ? OR id IN (SELECT session_id FROM trials WHERE time >= ?) ORDER BY id",
+        (since, since)
+    )
+    for row in cursor:
+        for (name, _), value in zip(SESSION_COLUMNS, row):
+            writers[name].append(value)
+        rows += 1
+    return close_columns(writers, rows)
+
+def export_trials(connection, directory, since):
+    """Write the trials given since a Unix time, with a column for each stimulus parameter"""
+    writers = open_columns(directory, TRIAL_COLUMNS)
+    params = {}  # parameter name -> writer
+    rows = 0
+    
+    # Rounds are numbered over all trials of a session, also those of a session that started before since
+    cursor = connection.execute(
+        "SELECT time, session_id, game, round, correct, points, response_ms, streak, params FROM ("
+        "  SELECT *, ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY id) - 1 AS round FROM trials"
+        "  WHERE session_id IS NULL OR session_id IN (SELECT session_id FROM trials WHERE time >= ?)"
+        ") WHERE time >= ? ORDER BY id",
+        (since, since)
+    )
+    for trial_time, session, game, round_index, correct, points, response_ms, streak, params_json in cursor:
+        for name, value in (("time", trial_time), ("session", session), ("game", game), ("round", round_index),
+                            ("correct", correct), ("points", points), ("response_ms", response_ms),
+                            ("streak", streak)):
+            writers[name].append(value)
+
+        # Numbers are stored as float32 and strings as category codes, other values as missing
+        values = json.loads(params_json) if params_json else {}
+        for name, value in values.items():
+            if name not in params and isinstance(value, (int, float, str)):
+                categorical = isinstance(value, str)
+                path = os.path.join(directory, f"param_{name}.bin")
+                params[name] = ColumnWriter(path, "H" if categorical else "f", categorical)
+                params[name].fill(rows)
+        for name, writer in params.items():
+            writer.append(values.get(name))
+        rows += 1
+
+    writers.update((f"param_{name}", writer) for name, writer in params.items())
+    return close_columns(writers, rows)
+
+def summarize(table, game=None):
+    """Get trials, accuracy, points and mean response time per game by scanning the mapped columns"""
+    games = table.categories("game")
+    only = table.code("game", game) if game else None
+    if game and only is None:
+        return {}
+    counts = [0] * len(games)
+    correct = [0] * len(games)
+    points = [0] * len(games)
+    timed = [0] * len(games)
+    response_total = [0.0] * len(games)
+
+    game_column = table.column("game")
+    correct_column = table.column("correct")
+    points_column = table.column("points")
+    response_column = table.column("response_ms")
+    for row in range(table.rows):
+        code = game_column[row]
+        if only is not None and code != only or code == CATEGORY_NULL:
+            continue
+        counts[code] += 1
+        correct[code] += correct_column[row]
+        points[code] += points_column[row]
+        response_ms = response_column[row]
+        if response_ms == response_ms:  # NaN marks an untimed answer
+            timed[code] += 1
+            response_total[code] += response_ms
+
+    return {
+        name: {
+            "trials": counts[code],
+            "accuracy": correct[code] / counts[code],
+            "points": points[code],
+            "response_ms": response_total[code] / timed[code] if timed[code] else None
+        }
+        for code, name in enumerate(games) if counts[code]
+    }
+
+def main_columnar():
+    """Export the history or summarize an export, as given on the command line"""
+    parser = argparse.ArgumentParser(description="Columnar export of the MindGym history")
+    parser.add_argument("command", choices=["export", "summary"])
+    parser.add_argument("--db", default=HISTORY_PATH, help="history database to export")
+    parser.add_argument("--out", default=EXPORT_DIR, help="directory of the export")
+    parser.add_argument("--days", type=float, help="export only the last days")
+    parser.add_argument("--game", help="summarize only one game")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        since = time.time() - args.days * 86400 if args.days else None
+        manifest = export_history(args.db, args.out, since)
+        tables = manifest["tables"]
+        print(f"{tables['sessions']['rows']} sessions and {tables['trials']['rows']} trials "
+              f"in {len(tables['trials']['columns'])} trial columns written to {args.out}")
+        return
+
+    table = ColumnarTable(args.out, "trials")
+    try:
+        for game, summary in summarize(table, args.game).items():
+            response_ms = f"{summary['response_ms']:.0f} ms" if summary["response_ms"] is not None else "-"
+            print(f"{game:<12} {summary['trials']:>8} trials  accuracy {summary['accuracy']:.0%}  "
+                  f"points {summary['points']}  mean response {response_ms}")
+    finally:
+        table.close()
+
+if __name__ == "__main__":
+    main_columnar()
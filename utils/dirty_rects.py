@@ -0,0 +1,43 @@
+import pygame
+
+# Regions changed during the current frame
+dirty_rects = []
+# Regions pushed last frame, they must be pushed again so old content is erased
+previous_rects = []
+# Push the whole window on the next present
+full_update = True
+# Dirty-rect mode can be switched off, every present is then a full flip
+enabled = True
+
+# Above this share of the window a full flip is cheaper than many small updates
+FULL_UPDATE_RATIO = 0.6
+
+def mark_dirty(rect):
+    """Report a screen region that changed this frame"""
+    dirty_rects.append(pygame.Rect(rect))
+
+def mark_full():
+    """Request a full window update on the next present"""
+    global full_update
+    full_update = True
+
+def present():
+    """Push the changed regions of the frame to the display"""
+    global dirty_rects, previous_rects, full_update
+
+    screen = pygame.display.get_surface()
+    rects = previous_rects + dirty_rects
+
+    if not enabled or full_update or covered_area(rects) > FULL_UPDATE_RATIO * screen.get_width() * screen.get_height():
+        # Fall back to a full flip
+        pygame.display.flip()
+    elif rects:
+        pygame.display.update(rects)
+
+    previous_rects = dirty_rects
+    dirty_rects = []
+    full_update = False
+
+def covered_area(rects):
+    """Get an upper bound of the area covered by the rects"""
+    return sum(rect.width * rect.height for rect in rects)
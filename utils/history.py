@@ -0,0 +1,233 @@
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    game TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    score INTEGER
+);
+CREATE INDEX IF NOT EXISTS sessions_game_started ON sessions (game, started_at);
+
+CREATE TABLE IF NOT EXISTS trials (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER REFERENCES sessions (id),
+    game TEXT NOT NULL,
+    time REAL NOT NULL,
+    correct INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    response_ms REAL,
+    streak INTEGER NOT NULL,
+    params TEXT
+);
+CREATE INDEX IF NOT EXISTS trials_game_time ON trials (game, time, correct, points, response_ms);
+CREATE INDEX IF NOT EXISTS trials_game_streak ON trials (game, streak);
+CREATE INDEX IF NOT EXISTS trials_session ON trials (session_id);
+"""
+
+# Rows written per transaction at most, and how long the writer waits to fill a batch
+BATCH_SIZE = 500
+BATCH_WAIT = 0.5
+
+class HistoryStore:
+    """Records sessions and trials in SQLite from a background writer thread"""
+
+    def __init__(self, path):
+        """Initialize the store for a database file and start its writer thread"""
+        self.path = path
+        self.queue = queue.Queue()
+        self.next_session = 1
+        self.current_session = None
+        self.streak = 0
+        self.last_error = None
+        self.reader = None
+        self.thread = threading.Thread(target=self.run, name="history-writer", daemon=True)
+        self.thread.start()
+
+    def connect(self):
+        """Open a connection in WAL mode, creating the tables if needed"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def start_session(self, game):
+        """Start recording a session of a game, ending the previous one"""
+        self.end_session()
+        self.current_session = self.next_session
+        self.next_session += 1
+        self.streak = 0
+        self.put(("session", self.current_session, game, time.time()))
+
+    def end_session(self, score=None):
+        """End the current session with its final score"""
+        if self.current_session is not None:
+            self.put(("end", self.current_session, time.time(), score))
+            self.current_session = None
+
+    def record_trial(self, trial):
+        """Queue a trial reported by a game, usable as a trial listener"""
+        self.streak = self.streak + 1 if trial["correct"] else 0
+        self.put(("trial", self.current_session, trial, self.streak))
+
+    def put(self, record):
+        """Queue a record for the writer, dropping it if the database could not be opened"""
+        if self.thread.is_alive():
+            self.queue.put(record)
+
+    def run(self):
+        """Write queued records in batched transactions until the store is closed"""
+        try:
+            connection = self.connect()
+        except sqlite3.Error as error:
+            self.fail(error)
+            return
+
+        # Session numbers of this process mapped to their row ids
+        session_ids = {}
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + BATCH_WAIT
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            try:
+                with connection:
+                    running = self.write_batch(connection, batch, session_ids)
+            except sqlite3.Error as error:
+                self.fail(error)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+        connection.close()
+
+    def write_batch(self, connection, batch, session_ids):
+        """Write a batch of records in one transaction, return False when closing"""
+        trials = []
+        running = True
+        for record in batch:
+            kind = record[0]
+            if kind == "trial":
+                _, session, trial, streak = record
+                trials.append((
+                    session_ids.get(session),
+                    trial["game"],
+                    trial["time"],
+                    int(trial["correct"]),
+                    trial["points"],
+                    trial["response_ms"],
+                    streak,
+                    json.dumps(trial["params"]) if trial["params"] else None
+                ))
+                continue
+
+            # Keep the order of trials and session rows
+            if trials:
+                insert_trials(connection, trials)
+                trials = []
+
+            if kind == "session":
+                _, session, game, started_at = record
+                cursor = connection.execute(
+                    "INSERT INTO sessions (game, started_at) VALUES (?, ?)",
+                    (game, started_at)
+                )
+                session_ids[session] = cursor.lastrowid
+            elif kind == "end":
+                _, session, ended_at, score = record
+                connection.execute(
+                    "UPDATE sessions SET ended_at = ?, score = ? WHERE id = ?",
+                    (ended_at, score, session_ids.pop(session, None))
+                )
+            elif kind == "close":
+                running = False
+
+        if trials:
+            insert_trials(connection, trials)
+        return running
+
+    def fail(self, error):
+        """Remember and report a database error, the game keeps running without history"""
+        self.last_error = error
+        print(f"Could not record history: {error}", file=sys.stderr)
+
+    def flush(self):
+        """Wait until every queued record is written"""
+        if self.thread.is_alive():
+            self.queue.join()
+
+    def close(self, timeout=5):
+        """End the current session, write everything queued and stop the writer thread"""
+        self.end_session()
+        self.queue.put(("close",))
+        self.thread.join(timeout)
+        if self.reader:
+            self.reader.close()
+            self.reader = None
+
+    def query(self, sql, parameters=()):
+        """Run a read-only query on the caller's own connection"""
+        if self.reader is None:
+            self.reader = sqlite3.connect(self.path, check_same_thread=False)
+        return self.reader.execute(sql, parameters).fetchall()
+
+    def trials_since(self, game, days):
+        """Get (time, correct, points, response_ms) of a game's trials of the last days"""
+        return self.query(
+            "SELECT time, correct, points, response_ms FROM trials WHERE game = ? AND time >= ? ORDER BY time",
+            (game, time.time() - days * 86400)
+        )
+
+    def summary_since(self, days):
+        """Get trial count, accuracy, points and mean response time per game for the last days"""
+        since = time.time() - days * 86400
+        summary = {}
+        for game in ("two_choice", "shape_grid", "memory_grid"):
+            count, correct, points, response_ms = self.query(
+                "SELECT COUNT(*), SUM(correct), SUM(points), AVG(response_ms) FROM trials WHERE game = ? AND time >= ?",
+                (game, since)
+            )[0]
+            summary[game] = {
+                "trials": count,
+                "accuracy": (correct or 0) / count if count else 0.0,
+                "points": points or 0,
+                "response_ms": response_ms
+            }
+        return summary
+
+    def best_streak(self, game):
+        """Get the longest run of correct answers within one session of a game"""
+        return self.query("SELECT MAX(streak) FROM trials WHERE game = ?", (game,))[0][0] or 0
+
+    def best_session(self, game):
+        """Get the (score, started_at) of a game's best finished session"""
+        rows = self.query(
+            "SELECT score, started_at FROM sessions WHERE game = ? AND score IS NOT NULL ORDER BY score DESC LIMIT 1",
+            (game,)
+        )
+        return rows[0] if rows else None
+
+def insert_trials(connection, trials):
+    """Insert trial rows with a single statement"""
+    connection.executemany(
+        "INSERT INTO trials (session_id, game, time, correct, points, response_ms, streak, params) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        trials
+    )
@@ -0,0 +1,16 @@
+from utils.assets import to_display_format
+
+# Composed layers by name, each stored with the key it was built for
+layers = {}
+
+def get_layer(name, key, build):
+    """Return the layer composed for name, rebuilding it with build() when key changed"""
+    cached = layers.get(name)
+    if cached is None or cached[0] != key:
+        cached = (key, to_display_format(build()))
+        layers[name] = cached
+    return cached[1]
+
+def clear_layers():
+    """Drop all composed layers, e.g. after a window resize"""
+    layers.clear()
@@ -0,0 +1,121 @@
+import functools
+
+import pygame
+from engine import shape_grid, memory_grid
+
+TOP_BAR_HEIGHT = 50
+
+# Layouts already computed, keyed by layout name, window size and arguments
+layouts = {}
+
+def cached(build):
+    """Make a layout function compute its rects once per window size and arguments"""
+    @functools.wraps(build)
+    def get(*args):
+        key = (build.__name__,) + args
+        layout = layouts.get(key)
+        if layout is None:
+            layout = layouts[key] = build(*args)
+        return layout
+    return get
+
+def clear_layouts():
+    """Drop the layouts of earlier window sizes"""
+    layouts.clear()
+
+def window_size():
+    """Get the size of the game window"""
+    return pygame.display.get_surface().get_size()
+
+class Grid:
+    """Rows and columns of equal cells that finds the cell at a point arithmetically"""
+
+    def __init__(self, x, y, cell_width, cell_height, rows, cols):
+        """Initialize the grid and the rects of its cells"""
+        self.x = int(x)
+        self.y = int(y)
+        self.cell_width = int(cell_width)
+        self.cell_height = int(cell_height)
+        self.rows = rows
+        self.cols = cols
+        self.rect = pygame.Rect(self.x, self.y, self.cell_width * cols, self.cell_height * rows)
+        self.cells = [
+            [pygame.Rect(self.x + col * self.cell_width, self.y + row * self.cell_height, self.cell_width, self.cell_height)
+             for col in range(cols)]
+            for row in range(rows)
+        ]
+
+    def cell_at(self, pos):
+        """Get the (row, col) of the cell at a point, or None outside the grid"""
+        if not self.rect.collidepoint(pos):
+            return None
+        return (pos[1] - self.y) // self.cell_height, (pos[0] - self.x) // self.cell_width
+
+@cached
+def top_bar_layout(width):
+    """Get the bar, timer, score and button positions of the top bar"""
+    return {
+        "bar": pygame.Rect(0, 0, width, TOP_BAR_HEIGHT),
+        "timer": (width // 2 - 40, 15),
+        "progress": pygame.Rect(width // 2 - 100, 40, 200, 10),
+        "score": (width - 250, 15),
+        "rules": pygame.Rect(width - 100, 15, 30, 30),
+        "mute": pygame.Rect(width - 50, 15, 30, 30)
+    }
+
+@cached
+def menu_layout(width, height, games):
+    """Get the box of each game on the menu"""
+    box_width, box_height = 600, 100
+    box_x = (width - box_width) // 2
+    return [(game, pygame.Rect(box_x, 200 + i * 120, box_width, box_height)) for i, game in enumerate(games)]
+
+@cached
+def rules_modal_layout(width, height):
+    """Get the box and the start and back buttons of the rules modal"""
+    box = pygame.Rect((width - 600) // 2, (height - 400) // 2, 600, 400)
+    return {
+        "box": box,
+        "start": pygame.Rect(box.x + 100, box.bottom - 70, 150, 50),
+        "back": pygame.Rect(box.right - 250, box.bottom - 70, 150, 50)
+    }
+
+@cached
+def game_over_layout(width, height):
+    """Get the box and the replay and menu buttons of the game over screen"""
+    box = pygame.Rect((width - 500) // 2, (height - 300) // 2, 500, 300)
+    return {
+        "box": box,
+        "replay": pygame.Rect(width // 2 - 220, box.y + 220, 200, 50),
+        "menu": pygame.Rect(width // 2 + 20, box.y + 220, 200, 50)
+    }
+
+@cached
+def two_choice_layout(width, height):
+    """Get the left and right boxes of the two choice game"""
+    box_width, box_height = 200, 200
+    box_y = 150
+    return (
+        pygame.Rect(width // 2 - box_width - 50, box_y, box_width, box_height),
+        pygame.Rect(width // 2 + 50, box_y, box_width, box_height)
+    )
+
+@cached
+def shape_grid_layout(width, height):
+    """Get the square cells of the shape grid, centered below the target text"""
+    grid_size = min(width, height) * 0.6
+    cell_size = grid_size // shape_grid.GRID_COLS
+    grid_x = (width - grid_size) // 2
+    grid_y = (height - grid_size) // 2 + 30
+    return Grid(grid_x, grid_y, cell_size, cell_size, shape_grid.GRID_ROWS, shape_grid.GRID_COLS)
+
+@cached
+def memory_grid_layout(width, height):
+    """Get the cells of the memory grid, filling most of the window"""
+    grid_width = width * 0.8
+    grid_height = height * 0.6
+    cell_width = grid_width // memory_grid.GRID_COLS
+    cell_height = grid_height // memory_grid.GRID_ROWS
+    grid_x = (width - grid_width) // 2
+    grid_y = (height - grid_height) // 2 + 30
+    return Grid(grid_x, grid_y, cell_width, cell_height, memory_grid.GRID_ROWS, memory_grid.GRID_COLS)
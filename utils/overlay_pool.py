@@ -0,0 +1,23 @@
+import pygame
+from utils.assets import to_display_format
+
+# Filled overlays keyed by (size, color, alpha), the sizes depend on the window size
+overlays = {}
+
+def get_overlay(size, color, alpha=None):
+    """Get a pooled overlay of size filled with color, translucent for an RGBA color or an alpha"""
+    # The overlay is shared, callers blit it but never draw on it
+    key = (tuple(size), tuple(color), alpha)
+    overlay = overlays.get(key)
+    if overlay is None:
+        overlay = pygame.Surface(size, pygame.SRCALPHA if len(color) == 4 else 0)
+        overlay.fill(color)
+        overlay = to_display_format(overlay)
+        if alpha is not None:
+            overlay.set_alpha(alpha)
+        overlays[key] = overlay
+    return overlay
+
+def clear_overlays():
+    """Drop the overlays of the old window size"""
+    overlays.clear()
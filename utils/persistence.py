@@ -0,0 +1,110 @@
+import json
+import os
+import sys
+import threading
+
+class HighscoreStore:
+    """Loads high scores and saves them atomically from a background writer thread"""
+
+    def __init__(self, path, defaults, read=None, name="highscore-writer"):
+        """Initialize the store for a JSON file and start its writer thread, read checks a file and loads it"""
+        self.path = path
+        self.backup_path = path + ".bak"
+        self.defaults = dict(defaults)
+        self.read = read or read_scores
+        self.pending = None
+        self.closed = False
+        self.writes = 0
+        self.last_error = None
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def load(self):
+        """Load the scores, recovering from the previous generation if the file is corrupt"""
+        for path in (self.path, self.backup_path):
+            scores = self.read(path)
+            if scores is not None:
+                return {**self.defaults, **scores}
+        return dict(self.defaults)
+
+    def exists(self):
+        """Check if a scores file or its previous generation exists"""
+        return os.path.exists(self.path) or os.path.exists(self.backup_path)
+
+    def save(self, scores):
+        """Queue a snapshot of the scores, a burst of saves is written once"""
+        with self.condition:
+            self.pending = dict(scores)
+            self.condition.notify()
+
+    def run(self):
+        """Write queued snapshots until the store is closed"""
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                scores, self.pending = self.pending, None
+
+            try:
+                self.write(scores)
+                self.writes += 1
+            except OSError as error:
+                self.last_error = error
+                print(f"Could not save {self.path}: {error}", file=sys.stderr)
+
+    def write(self, scores):
+        """Replace the scores file atomically, keeping the old file as the previous generation"""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+
+        # Write the new generation next to the file and make sure it hit the disk
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(scores, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Keep the current file as the previous generation, unless it is corrupt
+        if self.read(self.path) is not None:
+            os.replace(self.path, self.backup_path)
+        os.replace(temp_path, self.path)
+        sync_directory(directory)
+
+    def close(self, timeout=5):
+        """Write any queued snapshot and stop the writer thread"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join(timeout)
+
+def read_scores(path):
+    """Read a scores file, returning None if it is missing or corrupt"""
+    try:
+        with open(path, "r") as f:
+            scores = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(scores, dict):
+        return None
+    for game, score in scores.items():
+        if not isinstance(game, str) or not isinstance(score, int) or isinstance(score, bool):
+            return None
+    return scores
+
+def sync_directory(directory):
+    """Flush a directory entry to disk so a rename survives a power loss"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Directories can't be opened on Windows, NTFS renames are journaled anyway
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
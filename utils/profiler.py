@@ -0,0 +1,128 @@
+import json
+import os
+import time
+from collections import deque
+
+import pygame
+from utils.text_cache import render_text
+
+class FrameProfiler:
+    """Times the phases of each frame and keeps rolling percentiles per game state"""
+
+    def __init__(self, enabled=True, window=600):
+        """Initialize the profiler, keeping the last window samples of each phase"""
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}  # (state, phase) -> deque of milliseconds
+        self.started = {}
+        self.state = None
+        self.frame_start = 0
+        self.overlay_visible = False
+        self.overlay_lines = []
+        self.overlay_frames = 0
+
+    def begin_frame(self, state):
+        """Start timing a frame drawn in the given state"""
+        if self.enabled:
+            self.state = state
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """Record the time spent on the frame, without the frame cap sleep"""
+        if self.enabled:
+            self.record("frame", (time.perf_counter() - self.frame_start) * 1000)
+
+    def start(self, phase):
+        """Start timing a phase of the current frame"""
+        if self.enabled:
+            self.started[phase] = time.perf_counter()
+
+    def stop(self, phase):
+        """Stop timing a phase and record its duration"""
+        if self.enabled:
+            self.record(phase, (time.perf_counter() - self.started.pop(phase)) * 1000)
+
+    def record(self, phase, milliseconds):
+        """Add a sample to the rolling window of a phase"""
+        key = (self.state, phase)
+        samples = self.samples.get(key)
+        if samples is None:
+            samples = self.samples[key] = deque(maxlen=self.window)
+        samples.append(milliseconds)
+
+    def percentiles(self, state, phase):
+        """Get p50/p95/p99/max of a phase in milliseconds"""
+        return percentiles(self.samples.get((state, phase), ()))
+
+    def toggle_overlay(self):
+        """Show or hide the timing overlay"""
+        self.overlay_visible = not self.overlay_visible
+        self.overlay_frames = 0
+
+    def draw_overlay(self, screen, font):
+        """Draw the slowest phases of the current state over the top bar"""
+        if not (self.enabled and self.overlay_visible):
+            return None
+
+        # Sorting the windows is cheap but not free, refresh twice a second
+        if self.overlay_frames % 30 == 0:
+            self.overlay_lines = self.overlay_text(self.state)
+        self.overlay_frames += 1
+
+        width = max(render_text(font, line, (255, 255, 0)).get_width() for line in self.overlay_lines) + 10
+        rect = pygame.Rect(0, 0, width, 5 + 16 * len(self.overlay_lines))
+        pygame.draw.rect(screen, (0, 0, 0), rect)
+        for i, line in enumerate(self.overlay_lines):
+            screen.blit(render_text(font, line, (255, 255, 0)), (5, 3 + i * 16))
+        return rect
+
+    def overlay_text(self, state):
+        """Get the overlay lines: the whole frame and the slowest other phase"""
+        lines = []
+        phases = [(phase, samples) for (key_state, phase), samples in self.samples.items() if key_state == state and samples]
+        phases.sort(key=lambda item: (item[0] != "frame", -max(item[1])))
+
+        for phase, samples in phases[:2]:
+            stats = percentiles(samples)
+            lines.append(f"{phase}: p50 {stats['p50']:.1f} p95 {stats['p95']:.1f} p99 {stats['p99']:.1f} max {stats['max']:.1f} ms")
+        return lines
+
+    def summary(self):
+        """Get the percentiles of every phase grouped by state"""
+        result = {}
+        for (state, phase), samples in sorted(self.samples.items(), key=lambda item: (str(item[0][0]), item[0][1])):
+            result.setdefault(str(state), {})[phase] = percentiles(samples)
+        return result
+
+    def write_summary(self, path, extra=None):
+        """Write the summary as JSON and print it as a table"""
+        summary = {"phases": self.summary()}
+        if extra:
+            summary.update(extra)
+
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=2)
+        except OSError:
+            pass
+
+        print(f"{'state':<12} {'phase':<18} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}  (ms)")
+        for state, phases in summary["phases"].items():
+            for phase, stats in phases.items():
+                print(f"{state:<12} {phase:<18} {stats['p50']:>7.2f} {stats['p95']:>7.2f} {stats['p99']:>7.2f} {stats['max']:>7.2f}")
+
+def percentiles(samples):
+    """Get p50/p95/p99/max and the count of a list of samples"""
+    if not samples:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        "count": len(ordered),
+        "p50": ordered[round(last * 0.50)],
+        "p95": ordered[round(last * 0.95)],
+        "p99": ordered[round(last * 0.99)],
+        "max": ordered[last]
+    }
@@ -0,0 +1,73 @@
+from collections import deque
+
+from utils.timer import get_ticks, precise_ticks
+from utils.profiler import percentiles
+
+# How late SDL may notice an event during a blocking wait, it checks the queue at least every millisecond.
+# This is an assumed bound, the real delay of an event caught by a wait can't be measured.
+WAIT_RESOLUTION_MS = 1.0
+
+# Onsets and input stamps are milliseconds of the game clock with sub-millisecond resolution.
+# A replay turns precise off and times answers with the frame ticks, which replay exactly.
+precise = True
+
+onset = 0  # when the current stimulus appeared
+onset_pending = False  # the stimulus was drawn but not flipped yet
+input_at = None  # stamp of the input being handled
+input_error = 0.0  # how much earlier that input may have happened
+input_measured = True  # the error was measured rather than assumed
+last_poll = None  # when the event queue was last found empty or emptied
+errors = deque(maxlen=10000)  # measured timing error of recent answers
+bounded_answers = 0  # answers whose error is only the assumed WAIT_RESOLUTION_MS bound
+
+def new_stimulus():
+    """Time answers from the flip of the frame being drawn now, which shows a new stimulus"""
+    global onset, onset_pending
+    onset = get_ticks()
+    onset_pending = precise
+
+def frame_presented():
+    """Set the onset of a new stimulus, called right after the frame showing it was flipped"""
+    global onset, onset_pending
+    if onset_pending:
+        onset = precise_ticks()
+        onset_pending = False
+
+def stamp_events(events, error=None):
+    """Stamp events taken from the queue now, with the time since the queue was last checked or an assumed error"""
+    global last_poll
+    now = precise_ticks()
+    measured = error is None
+    if measured:
+        error = now - last_poll if last_poll is not None else 0.0
+    for event in events:
+        event.stamp = now
+        event.stamp_error = error
+        event.stamp_measured = measured
+    last_poll = now
+
+def set_input(event):
+    """Time the answers given by the event being handled by its stamp"""
+    global input_at, input_error, input_measured
+    input_at = getattr(event, "stamp", None)
+    input_error = getattr(event, "stamp_error", 0.0)
+    input_measured = getattr(event, "stamp_measured", True)
+
+def response():
+    """Get the milliseconds from the stimulus onset to the input being handled, and their possible error"""
+    global bounded_answers
+    if not precise or input_at is None or onset_pending:
+        return get_ticks() - onset, None
+
+    if input_measured:
+        errors.append(input_error)
+    else:
+        bounded_answers += 1
+    return round(input_at - onset, 3), round(input_error, 3)
+
+def jitter():
+    """Get p50/p95/p99/max of the measured timing error of recent answers, and how many answers only have the bound"""
+    stats = percentiles(errors)
+    stats["bounded"] = bounded_answers
+    stats["bound_ms"] = WAIT_RESOLUTION_MS
+    return stats
@@ -0,0 +1,148 @@
+import struct
+import sys
+from array import array
+
+import pygame
+from utils.timer import clock_ticks
+
+# File header: magic, version, seed, window size, start ticks, frame and event counts
+MAGIC = b"MGREC"
+VERSION = 1
+HEADER = struct.Struct("<5sBQHHIII")
+
+# Event kinds stored in the log
+KIND_KEYDOWN = 1
+KIND_MOUSEBUTTONDOWN = 2
+KIND_VIDEORESIZE = 3
+KIND_QUIT = 4
+
+class InputRecorder:
+    """Records the events dispatched by the main loop into compact typed arrays"""
+
+    def __init__(self, seed, size):
+        """Initialize an empty recording of a session seeded with seed"""
+        self.seed = seed
+        self.size = size
+        self.start_ticks = None
+        self.last_ticks = 0
+        self.frame_ms = array("I")   # milliseconds since the previous frame
+        self.frames = array("I")     # frame index of each event
+        self.times = array("I")      # milliseconds since the recording started
+        self.kinds = array("B")
+        self.values = array("i")     # key or mouse button
+        self.xs = array("h")         # mouse x or window width
+        self.ys = array("h")         # mouse y or window height
+
+    def record_frame(self, ticks, events):
+        """Record the time of a frame and the events handled in it"""
+        if self.start_ticks is None:
+            self.start_ticks = ticks
+            self.last_ticks = ticks
+        self.frame_ms.append(ticks - self.last_ticks)
+        self.last_ticks = ticks
+
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                self.append(KIND_KEYDOWN, event.key, 0, 0)
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                self.append(KIND_MOUSEBUTTONDOWN, event.button, *event.pos)
+            elif event.type == pygame.VIDEORESIZE:
+                self.append(KIND_VIDEORESIZE, 0, event.w, event.h)
+            elif event.type == pygame.QUIT:
+                self.append(KIND_QUIT, 0, 0, 0)
+
+    def append(self, kind, value, x, y):
+        """Append an event to the columns"""
+        self.frames.append(len(self.frame_ms) - 1)
+        self.times.append(self.last_ticks - self.start_ticks)
+        self.kinds.append(kind)
+        self.values.append(value)
+        self.xs.append(x)
+        self.ys.append(y)
+
+    def save(self, path):
+        """Write the recording to a binary file"""
+        columns = (self.frame_ms, self.frames, self.times, self.kinds, self.values, self.xs, self.ys)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, self.size[0], self.size[1],
+                                self.start_ticks or 0, len(self.frame_ms), len(self.frames)))
+            for column in columns:
+                f.write(little_endian(column).tobytes())
+
+class InputReplayer:
+    """Plays a recording back frame by frame with the recorded frame times"""
+
+    def __init__(self, path):
+        """Load a recording from a binary file"""
+        with open(path, "rb") as f:
+            data = f.read()
+
+        magic, version, self.seed, width, height, self.start_ticks, frame_count, event_count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a MindGym input recording")
+        self.size = (width, height)
+
+        offset = HEADER.size
+        self.frame_ms, offset = read_column(data, offset, "I", frame_count)
+        self.frames, offset = read_column(data, offset, "I", event_count)
+        self.times, offset = read_column(data, offset, "I", event_count)
+        self.kinds, offset = read_column(data, offset, "B", event_count)
+        self.values, offset = read_column(data, offset, "i", event_count)
+        self.xs, offset = read_column(data, offset, "h", event_count)
+        self.ys, offset = read_column(data, offset, "h", event_count)
+
+        self.frame = -1
+        self.ticks = self.start_ticks
+        self.next_event = 0
+        self.started_at = None
+
+    def next_frame(self):
+        """Advance to the next frame, return its ticks and events or None at the end"""
+        self.frame += 1
+        if self.frame >= len(self.frame_ms):
+            return None
+        self.ticks += self.frame_ms[self.frame]
+
+        events = []
+        while self.next_event < len(self.frames) and self.frames[self.next_event] <= self.frame:
+            i = self.next_event
+            self.next_event += 1
+            kind = self.kinds[i]
+            if kind == KIND_KEYDOWN:
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=self.values[i], mod=0, unicode="", scancode=0))
+            elif kind == KIND_MOUSEBUTTONDOWN:
+                events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=self.values[i], pos=(self.xs[i], self.ys[i])))
+            elif kind == KIND_VIDEORESIZE:
+                events.append(pygame.event.Event(pygame.VIDEORESIZE, w=self.xs[i], h=self.ys[i], size=(self.xs[i], self.ys[i])))
+            elif kind == KIND_QUIT:
+                events.append(pygame.event.Event(pygame.QUIT))
+        return self.ticks, events
+
+    def wait_for_frame(self):
+        """Sleep until the current frame is due, to play back at the recorded pace"""
+        now = clock_ticks()
+        if self.started_at is None:
+            self.started_at = now - self.elapsed()
+        delay = self.started_at + self.elapsed() - now
+        if delay > 0:
+            pygame.time.wait(delay)
+
+    def elapsed(self):
+        """Get the milliseconds since the start of the recording at the current frame"""
+        return self.ticks - self.start_ticks
+
+def little_endian(column):
+    """Get a column in little-endian byte order"""
+    if sys.byteorder == "big" and column.itemsize > 1:
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column
+
+def read_column(data, offset, typecode, count):
+    """Read a little-endian column of count items, returning it and the next offset"""
+    column = array(typecode)
+    end = offset + column.itemsize * count
+    column.frombytes(data[offset:end])
+    if sys.byteorder == "big" and column.itemsize > 1:
+        column.byteswap()
+    return column, end
@@ -0,0 +1,61 @@
+import builtins
+import sys
+import threading
+import time
+
+# Startup is measured from the first import of this module
+started = time.perf_counter()
+
+marks = []  # (label, milliseconds since start)
+imports = []  # (module, milliseconds including and excluding nested imports)
+tracking = threading.local()
+
+def elapsed():
+    """Get the milliseconds since startup began"""
+    return (time.perf_counter() - started) * 1000
+
+def mark(label):
+    """Record that a startup step finished"""
+    marks.append((label, elapsed()))
+
+def track_imports():
+    """Time the first import of every module from now on"""
+    original_import = builtins.__import__
+
+    def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        # Only first imports are timed, of a module or of submodules imported from a package
+        label = name
+        if level == 0 and name in sys.modules:
+            missing = [item for item in fromlist or () if f"{name}.{item}" not in sys.modules
+                       and not hasattr(sys.modules[name], item)]
+            if not missing:
+                return original_import(name, globals, locals, fromlist, level)
+            label = f"{name}.{','.join(missing)}"
+
+        stack = getattr(tracking, "stack", None)
+        if stack is None:
+            stack = tracking.stack = []
+        stack.append(0.0)  # time spent in nested imports
+        start = time.perf_counter()
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            total = (time.perf_counter() - start) * 1000
+            nested = stack.pop()
+            if stack:
+                stack[-1] += total
+            imports.append((label, total, total - nested))
+
+    builtins.__import__ = timed_import
+
+def report(limit=15):
+    """Print the startup steps and the slowest imports"""
+    print(f"{'startup step':<32} {'ms':>8}")
+    for label, milliseconds in marks:
+        print(f"{label:<32} {milliseconds:>8.1f}")
+
+    if imports:
+        print()
+        print(f"{'import':<32} {'total ms':>8} {'self ms':>8}")
+        for name, total, own in sorted(imports, key=lambda item: -item[2])[:limit]:
+            print(f"{name:<32} {total:>8.1f} {own:>8.1f}")
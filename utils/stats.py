@@ -0,0 +1,231 @@
+"""Live statistics per player and game in constant memory
+
+Scores and reaction times go into log-bucketed histograms and accuracy
+into an exponentially weighted average, so no trial is kept and nothing
+is read back from the history:
+
+    python -m utils.stats
+"""
+import argparse
+import json
+import math
+
+from utils.persistence import HighscoreStore
+
+STATS_PATH = "data/stats.json"
+
+# Neighbouring buckets differ by 2%, so a quantile is within 1% of the true value
+BUCKET_GROWTH = 1.02
+LOG_GROWTH = math.log(BUCKET_GROWTH)
+
+# Statistics cover about the last WINDOW_SESSIONS sessions, older ones fade out
+WINDOW_SESSIONS = 20
+DECAY = 1 - 1 / WINDOW_SESSIONS
+MIN_WEIGHT = 0.001  # buckets that faded below this are dropped
+
+# Answers on this machine belong to the local player
+DEFAULT_PLAYER = "local"
+MAX_PLAYERS = 1000
+
+class LogHistogram:
+    """Weighted counts of values in buckets of logarithmic width, a few hundred buckets at most"""
+
+    def __init__(self, counts=None):
+        """Initialize a histogram, optionally from its bucket counts"""
+        self.counts = dict(counts or {})
+        self.total = sum(self.counts.values())
+
+    def add(self, value, weight=1.0):
+        """Count a value"""
+        key = bucket(value)
+        self.counts[key] = self.counts.get(key, 0.0) + weight
+        self.total += weight
+
+    def decay(self, factor):
+        """Fade every count by a factor, dropping buckets that are nearly empty"""
+        self.counts = {key: count * factor for key, count in self.counts.items() if count * factor >= MIN_WEIGHT}
+        self.total = sum(self.counts.values())
+
+    def quantile(self, q):
+        """Get the value below which a q share of the counts fall, None if the histogram is empty"""
+        if not self.counts:
+            return None
+        rank = q * self.total
+        seen = 0.0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= rank:
+                return bucket_value(key)
+        return bucket_value(max(self.counts))
+
+    def to_list(self):
+        """Get the bucket counts as [key, count] pairs for JSON"""
+        return [[key, round(count, 4)] for key, count in sorted(self.counts.items())]
+
+class Ewma:
+    """Exponentially weighted moving average of about the last span samples"""
+
+    def __init__(self, span, value=None):
+        """Initialize the average"""
+        self.alpha = 2 / (span + 1)
+        self.value = value
+
+    def add(self, sample):
+        """Move the average towards a sample"""
+        if self.value is None:
+            self.value = sample
+        else:
+            self.value += self.alpha * (sample - self.value)
+
+class GameStats:
+    """Statistics of one player at one game"""
+
+    def __init__(self, data=None):
+        """Initialize empty statistics or load them from to_dict output"""
+        data = data or {}
+        self.scores = LogHistogram((key, count) for key, count in data.get("scores", []))
+        self.responses = LogHistogram((key, count) for key, count in data.get("responses", []))
+        self.accuracy = Ewma(WINDOW_SESSIONS, data.get("accuracy"))
+        self.sessions = data.get("sessions", 0)
+        self.trials = data.get("trials", 0)
+        self.best = data.get("best", 0)
+
+        # Answers of the session being played
+        self.session_trials = 0
+        self.session_correct = 0
+
+    def add_trial(self, trial):
+        """Count an answer of the current session"""
+        self.trials += 1
+        self.session_trials += 1
+        self.session_correct += trial["correct"]
+        if trial["response_ms"] is not None:
+            self.responses.add(trial["response_ms"])
+
+    def end_session(self, score):
+        """Count a finished session, fading out the older ones"""
+        self.scores.decay(DECAY)
+        self.responses.decay(DECAY)
+        self.scores.add(score)
+        if self.session_trials:
+            self.accuracy.add(self.session_correct / self.session_trials)
+        self.sessions += 1
+        self.best = max(self.best, score)
+        self.session_trials = 0
+        self.session_correct = 0
+
+    def summary(self):
+        """Get the median score, p90 reaction time and accuracy of about the last WINDOW_SESSIONS sessions"""
+        median = self.scores.quantile(0.5)
+        p90 = self.responses.quantile(0.9)
+        return {
+            "sessions": self.sessions,
+            "trials": self.trials,
+            "best": self.best,
+            "median_score": round(median) if median is not None else None,
+            "p90_response_ms": round(p90, 1) if p90 is not None else None,
+            "accuracy": self.accuracy.value
+        }
+
+    def to_dict(self):
+        """Get the statistics as JSON data"""
+        return {
+            "scores": self.scores.to_list(),
+            "responses": self.responses.to_list(),
+            "accuracy": self.accuracy.value,
+            "sessions": self.sessions,
+            "trials": self.trials,
+            "best": self.best
+        }
+
+class StreamingStats:
+    """Statistics of every player and game, updated as answers and sessions come in"""
+
+    def __init__(self, data=None):
+        """Initialize the statistics, optionally from to_dict output"""
+        self.players = {}
+        for player, games in (data or {}).items():
+            self.players[player] = {game: GameStats(stats) for game, stats in games.items()}
+
+    def get(self, game, player=DEFAULT_PLAYER):
+        """Get the statistics of a player at a game, None when no more players fit"""
+        games = self.players.get(player)
+        if games is None:
+            if len(self.players) >= MAX_PLAYERS:
+                return None
+            games = self.players[player] = {}
+        stats = games.get(game)
+        if stats is None:
+            stats = games[game] = GameStats()
+        return stats
+
+    def record_trial(self, trial, player=DEFAULT_PLAYER):
+        """Count an answer reported by a game, usable as a trial listener"""
+        stats = self.get(trial["game"], player)
+        if stats:
+            stats.add_trial(trial)
+
+    def end_session(self, game, score, player=DEFAULT_PLAYER):
+        """Count a finished session with its final score"""
+        stats = self.get(game, player)
+        if stats:
+            stats.end_session(score)
+
+    def summary(self, game, player=DEFAULT_PLAYER):
+        """Get the summary of a player at a game, None if they never played it"""
+        stats = self.players.get(player, {}).get(game)
+        return stats.summary() if stats else None
+
+    def to_dict(self):
+        """Get the statistics as JSON data"""
+        return {
+            player: {game: stats.to_dict() for game, stats in games.items()}
+            for player, games in self.players.items()
+        }
+
+def bucket(value):
+    """Get the histogram bucket of a value, 0 for values under 1 and negative keys for negative values"""
+    magnitude = abs(value)
+    if magnitude < 1:
+        return 0
+    key = 1 + int(math.log(magnitude) / LOG_GROWTH)
+    return key if value > 0 else -key
+
+def bucket_value(key):
+    """Get the middle of a histogram bucket"""
+    if key == 0:
+        return 0.0
+    value = BUCKET_GROWTH ** (abs(key) - 1) * (1 + BUCKET_GROWTH) / 2
+    return value if key > 0 else -value
+
+def read_stats(path):
+    """Read a statistics file, returning None if it is missing or corrupt"""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        StreamingStats(data)
+    except (OSError, ValueError, TypeError, AttributeError, KeyError):
+        return None
+    return data if isinstance(data, dict) else None
+
+def open_stats_store(path=STATS_PATH):
+    """Get a store that saves statistics atomically from a background thread"""
+    return HighscoreStore(path, {}, read=read_stats, name="stats-writer")
+
+def main_stats():
+    """Print the statistics saved on this machine"""
+    parser = argparse.ArgumentParser(description="Show MindGym player statistics")
+    parser.add_argument("--path", default=STATS_PATH)
+    args = parser.parse_args()
+
+    stats = StreamingStats(read_stats(args.path))
+    for player, games in stats.players.items():
+        print(player)
+        for game in games:
+            summary = stats.summary(game, player)
+            accuracy = f"{summary['accuracy']:.0%}" if summary["accuracy"] is not None else "-"
+            print(f"  {game:<12} {summary['sessions']:>5} sessions  median score {summary['median_score']}  "
+                  f"p90 reaction {summary['p90_response_ms']} ms  accuracy {accuracy}  best {summary['best']}")
+
+if __name__ == "__main__":
+    main_stats()
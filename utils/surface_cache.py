@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+from utils.assets import to_display_format
+
+class SurfaceCache:
+    """A bounded LRU cache of pre-rendered surfaces with a byte budget"""
+
+    def __init__(self, max_entries=256, max_bytes=8 * 1024 * 1024):
+        """Initialize the cache with an entry limit and a byte budget"""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, build):
+        """Return the surface stored under key, building it with build() on a miss"""
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        # Converted once here, every later blit of the surface takes the fast path
+        surface = to_display_format(build())
+        self.put(key, surface)
+        return surface
+
+    def put(self, key, surface):
+        """Store a surface, evicting the least recently used entries if needed"""
+        if key in self.entries:
+            self.bytes_used -= surface_bytes(self.entries.pop(key))
+
+        size = surface_bytes(surface)
+        if size > self.max_bytes:
+            # Too big to ever fit, don't let it flush everything else
+            return
+
+        self.entries[key] = surface
+        self.bytes_used += size
+
+        while len(self.entries) > self.max_entries or self.bytes_used > self.max_bytes:
+            _, old_surface = self.entries.popitem(last=False)
+            self.bytes_used -= surface_bytes(old_surface)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached surface (hit/miss counters are kept)"""
+        self.entries.clear()
+        self.bytes_used = 0
+
+    def stats(self):
+        """Get hit/miss counts and memory usage of the cache"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes_used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+def surface_bytes(surface):
+    """Get the number of bytes used by a surface's pixels"""
+    return surface.get_pitch() * surface.get_height()
@@ -0,0 +1,15 @@
+from utils.surface_cache import SurfaceCache
+
+# Rendered text shared by every screen, keyed by (font, text, color, antialias)
+text_cache = SurfaceCache(max_entries=512, max_bytes=8 * 1024 * 1024)
+
+def render_text(font, text, color, antialias=True):
+    """Render text with the font, reusing the surface rendered on an earlier frame"""
+    return text_cache.get(
+        (font, text, color, antialias),
+        lambda: font.render(text, antialias, color)
+    )
+
+def get_text_cache_stats():
+    """Get hit/miss counts of the text cache"""
+    return text_cache.stats()
@@ -1,4 +1,30 @@
-import pygame
+import time
+
+# Start of the game clock, pygame.time.get_ticks() only counts after pygame.init(),
+# which also opens the audio device and the joysticks before the window can show up
+clock_start = time.perf_counter()
+
+def clock_ticks():
+    """Get the milliseconds since the game clock started"""
+    return int((time.perf_counter() - clock_start) * 1000)
+
+def precise_ticks():
+    """Get the milliseconds since the game clock started, with sub-millisecond resolution"""
+    return (time.perf_counter() - clock_start) * 1000
+
+# Milliseconds of the current frame, latched by the main loop so every reading in a frame agrees
+frame_ticks = None
+
+def set_frame_ticks(ticks):
+    """Set the milliseconds of the current frame, None reads the game clock"""
+    global frame_ticks
+    frame_ticks = ticks
+
+def get_ticks():
+    """Get the milliseconds of the current frame"""
+    if frame_ticks is None:
+        return clock_ticks()
+    return frame_ticks
 
 class Timer:
     """A simple timer class for tracking game time"""
@@ -6,7 +32,7 @@ class Timer:
     def __init__(self, duration):
         """Initialize the timer with a duration in seconds"""
         self.duration = duration * 1000  # Convert to milliseconds
-        self.start_time = pygame.time.get_ticks()
+        self.start_time = get_ticks()
         self.paused = False
         self.pause_time = 0
         self.time_paused = 0
@@ -14,7 +40,7 @@ class Timer:
     def update(self):
         """Update the timer"""
         if not self.paused:
-            current_time = pygame.time.get_ticks()
+            current_time = get_ticks()
             elapsed = current_time - self.start_time - self.time_paused
             return elapsed < self.duration
         return True
@@ -24,7 +50,7 @@ class Timer:
         if self.paused:
             elapsed = self.pause_time - self.start_time - self.time_paused
         else:
-            current_time = pygame.time.get_ticks()
+            current_time = get_ticks()
             elapsed = current_time - self.start_time - self.time_paused
         
         time_left = max(0, self.duration - elapsed)
@@ -38,10 +64,10 @@ class Timer:
         """Pause the timer"""
         if not self.paused:
             self.paused = True
-            self.pause_time = pygame.time.get_ticks()
+            self.pause_time = get_ticks()
     
     def resume(self):
         """Resume the timer"""
         if self.paused:
-            self.time_paused += pygame.time.get_ticks() - self.pause_time
+            self.time_paused += get_ticks() - self.pause_time
             self.paused = False
\ No newline at end of file
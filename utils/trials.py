@@ -0,0 +1,28 @@
+import time
+
+# Functions called with every answer the games report
+trial_listeners = []
+
+def add_trial_listener(listener):
+    """Call listener(trial) for every answer given in any game"""
+    if listener not in trial_listeners:
+        trial_listeners.append(listener)
+
+def remove_trial_listener(listener):
+    """Stop calling a trial listener"""
+    if listener in trial_listeners:
+        trial_listeners.remove(listener)
+
+def report_trial(game, correct, points, response_ms=None, **params):
+    """Report an answer checked by a game's check_selection to all listeners"""
+    trial = {
+        "game": game,
+        "time": time.time(),
+        "correct": bool(correct),
+        "points": points,
+        "response_ms": response_ms,
+        "params": params
+    }
+    for listener in list(trial_listeners):
+        listener(trial)
+    return trial